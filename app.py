@@ -1,6 +1,23 @@
 import streamlit as st
-import tempfile, os, glob, time
-from ultralytics import YOLO
+import json
+import os
+import time
+from visionarmor import metrics
+from visionarmor.models import preload
+from visionarmor.results import VIOLATION_CLASSES, new_output_dir, video_fps, violation_alerts
+from visionarmor.regions import RegionMask
+from visionarmor.storage import LEASE_SECONDS, hold, spool_upload, start_janitor
+from visionarmor.files import file_url, start_file_server
+from visionarmor.jobs import CANCELLED, DONE, FAILED, QUEUED, get_jobs
+from visionarmor.events import PERIODS, get_events
+# The inference modules (ultralytics, torch, OpenCV) are imported by the
+# detection pages below, so the other pages never wait for them.
+
+# Seconds between progress refreshes while a video job is running
+VIDEO_POLL_INTERVAL = 1.0
+
+# Seconds between refreshes of the Live Cameras page
+CAMERA_POLL_INTERVAL = 1.0
 
 # Inject custom CSS for styling
 st.markdown(
@@ -17,83 +34,68 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# Load and warm up the shared model once per process, in the background so
+# the first page renders straight away; later reruns and sessions reuse it.
+preload()
+
+# Evict old per-request outputs and uploads in the background
+start_janitor()
+
+# Serve /metrics and/or dump JSON snapshots if configured in the environment
+metrics.start_exporters()
+
+# Stream large videos to the browser from disk if a file server port is configured
+start_file_server()
+
 #####################
-# Video Processing  #
+# Video Progress    #
 #####################
-def process_video(video_path):
+def show_job_progress(job):
     """
-    Process a video using YOLOv8 and return a dictionary containing:
-      - 'video': the path to the processed video (raw output from YOLO)
-      - 'images': a list of sample image file paths with detection results.
-      
-    The YOLO model saves the output to a subfolder in "runs/detect".
+    Show the state of a running video job: its queue position, or a progress
+    bar with ETA, the latest annotated frame and running per-class counts.
     """
-    model = YOLO("models/best.pt")
-    results = model.predict(source=video_path, show=False, save=True)
-    time.sleep(3)
-    
-    output_folders = glob.glob("runs/detect/*")
-    if not output_folders:
-        return None
-    latest_folder = max(output_folders, key=os.path.getmtime)
-    
-    video_files = glob.glob(os.path.join(latest_folder, "*.mp4"))
-    if not video_files:
-        video_files = glob.glob(os.path.join(latest_folder, "*.avi"))
-    if not video_files:
-        return None
-    processed_video = video_files[0]
-    
-    image_files = glob.glob(os.path.join(latest_folder, "*.jpg"))
-    if not image_files:
-        image_files = glob.glob(os.path.join(latest_folder, "*.png"))
-    image_files.sort()
-    sample_images = image_files[:3]
-    
-    return {"video": processed_video, "images": sample_images}
+    if job.status == QUEUED:
+        st.info(f"Video queued (position {get_jobs().queue_position(job.id)}), processing will start shortly...")
+        return
+    text = f"Processed frame {job.frames_done}"
+    if job.total_frames:
+        text += f" of {job.total_frames}"
+    if job.eta is not None:
+        text += f" (about {job.eta:.0f}s remaining)"
+    st.progress(job.progress or 0.0, text=text)
+    latest = job.latest
+    if latest is not None:
+        st.image(latest["frame"], channels="BGR", use_container_width=True)
+        st.markdown("\n".join(f"- **{cls.capitalize()}:** {count}"
+                              for cls, count in latest["totals"].items() if count > 0))
 
 #####################
-# Image Processing  #
+# Region Settings   #
 #####################
-def process_image(image_path):
+def region_sidebar():
     """
-    Process a single image using YOLOv8 and return:
-      - processed_image: the path to the processed image.
-      - detection_info: a dictionary containing counts for each of the 10 classes.
-      
-    The YOLO model saves the output image to a subfolder in "runs/detect".
+    Sidebar input for include/exclude polygons (JSON, coordinates as 0-1
+    fractions of the frame). Returns a `RegionMask`, or None when empty or invalid.
     """
-    model = YOLO("models/best.pt")
-    results = model.predict(source=image_path, show=False, save=True)
-    time.sleep(2)
-    
-    output_folders = glob.glob("runs/detect/*")
-    if not output_folders:
-        return None, None
-    latest_folder = max(output_folders, key=os.path.getmtime)
-    
-    image_files = glob.glob(os.path.join(latest_folder, "*.jpg"))
-    if not image_files:
-        image_files = glob.glob(os.path.join(latest_folder, "*.png"))
-    if not image_files:
-        return None, None
-    processed_image_path = image_files[0]
-    
-    # Define target classes from your dataset (all in lowercase)
-    target_classes = ['hardhat', 'mask', 'no-hardhat', 'no-mask', 'no-safety vest', 
-                      'person', 'safety cone', 'safety vest', 'machinery', 'vehicle']
-    detection_info = {cls: 0 for cls in target_classes}
-    
-    if results and len(results) > 0 and results[0].boxes is not None:
-        boxes = results[0].boxes
-        if boxes.cls is not None:
-            # Convert each detected class to lowercase and count occurrences
-            detected_classes = [results[0].names[int(cls)].lower() for cls in boxes.cls.cpu().numpy()]
-            for d in detected_classes:
-                if d in detection_info:
-                    detection_info[d] += 1
-                    
-    return processed_image_path, detection_info
+    st.sidebar.markdown("### Region of Interest")
+    text = st.sidebar.text_area(
+        "Include / exclude polygons (JSON)",
+        placeholder='{"include": [[[0.1, 0.3], [0.9, 0.3], [0.9, 1.0], [0.1, 1.0]]], "exclude": []}')
+    try:
+        return RegionMask.from_json(text)
+    except (ValueError, TypeError, AttributeError) as exc:
+        st.sidebar.error(f"Invalid region: {exc}")
+        return None
+
+def cascade_summary(stats):
+    """One line on how many frames the full model saw and what screening cost, for a caption."""
+    text = (f"Fast screening model: {stats['escalated']} of {stats['frames']} frame(s) "
+            f"escalated to the full model ({stats['escalation_rate']:.0%}).")
+    if stats["audited"]:
+        text += (f" On {stats['audited']} audited frame(s), counts differed by {stats['count_delta']:.2f} "
+                 f"boxes per frame and the violation verdict agreed {stats['verdict_agreement']:.0%} of the time.")
+    return text
 
 #####################
 # Additional Pages  #
@@ -164,6 +166,9 @@ def tutorial_page():
 pages = {
     "Detection (Video)": "video",
     "Image Detection": "image",
+    "Bulk Image Detection": "bulk",
+    "Live Cameras": "cameras",
+    "Violation History": "history",
     "Safety Measures Blog": "blog",
     "About": "about",
     "FAQ": "faq",
@@ -175,64 +180,206 @@ page_choice = st.sidebar.radio("Navigation", list(pages.keys()))
 # Main Content      #
 #####################
 if pages[page_choice] == "video":
+    with metrics.timed("import", page="video"):
+        from visionarmor.detection import cached_video, process_video
+        from visionarmor.cache import file_hash
+        from visionarmor.sampling import FrameSampler
+        from visionarmor.cascade import Cascade
+    
     st.title("PPE Detection on Construction Sites - Video")
     st.write("Upload a video file (MP4 or AVI) to detect PPE using the YOLOv8 model.")
     
-    if "processed_data" not in st.session_state:
-        st.session_state.processed_data = None
+    for key in ("processed_data", "processed_upload", "upload_path", "video_job"):
+        if key not in st.session_state:
+            st.session_state[key] = None
+    # Reconnecting with ?job=<id> picks up a job started by an earlier session
+    if st.session_state.video_job is None and "job" in st.query_params:
+        st.session_state.video_job = st.query_params["job"]
     
     uploaded_file = st.file_uploader("Choose a video file", type=["mp4", "avi"])
     
+    st.sidebar.markdown("### Frame Sampling")
+    by_fps = st.sidebar.radio("Sample frames by", ["Stride", "Target FPS"], horizontal=True) == "Target FPS"
+    frame_stride = st.sidebar.number_input("Run detection on every Nth frame", min_value=1, value=1,
+                                           disabled=by_fps)
+    target_fps = st.sidebar.number_input("Detection frames per second", min_value=0.5, value=5.0, step=0.5,
+                                         disabled=not by_fps)
+    motion_gate = st.sidebar.checkbox("Skip frames without motion", value=False)
+    motion_threshold = st.sidebar.slider("Motion sensitivity (% of pixels changed)",
+                                         min_value=0.1, max_value=10.0, value=1.0, step=0.1,
+                                         disabled=not motion_gate)
+    region = region_sidebar()
+    st.sidebar.markdown("### Model Cascade")
+    use_cascade = st.sidebar.checkbox("Screen frames with a fast model first", value=False)
+    
     if uploaded_file is not None:
-        tfile = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
-        tfile.write(uploaded_file.read())
-        tfile.flush()
+        # A new upload is written once and queued as a background job, and
+        # queued again when the settings change; repeats of earlier uploads
+        # and settings are served from the shared result cache without a job.
+        upload_id = (uploaded_file.name, uploaded_file.size)
+        settings = json.dumps({"by_fps": by_fps, "stride": frame_stride, "target_fps": target_fps,
+                               "motion_threshold": motion_threshold if motion_gate else None,
+                               "region": region.params() if region is not None else None,
+                               "cascade": use_cascade}, sort_keys=True)
+        if st.session_state.processed_upload != (upload_id, settings):
+            if st.session_state.processed_upload is None or st.session_state.processed_upload[0] != upload_id:
+                with metrics.timed("upload", mode="video"):
+                    st.session_state.upload_path = spool_upload(uploaded_file, ".mp4")
+            upload_path = st.session_state.upload_path
+            sampler = None
+            if by_fps:
+                sampler = FrameSampler.for_target_fps(video_fps(upload_path), target_fps,
+                                                      motion_threshold=motion_threshold / 100 if motion_gate else None)
+            elif frame_stride > 1 or motion_gate:
+                sampler = FrameSampler(stride=frame_stride,
+                                       motion_threshold=motion_threshold / 100 if motion_gate else None)
+            st.session_state.processed_upload = (upload_id, settings)
+            # The previous upload or settings are no longer wanted: free its worker
+            if st.session_state.video_job is not None:
+                get_jobs().cancel(st.session_state.video_job)
+            cascade = Cascade() if use_cascade else None
+            with metrics.timed("hash", mode="video"):
+                content_hash = file_hash(upload_path)
+            st.session_state.processed_data = cached_video(upload_path, sampler=sampler, region=region,
+                                                           cascade=cascade, content_hash=content_hash)
+            if st.session_state.processed_data is not None:
+                st.session_state.video_job = None
+                st.query_params.pop("job", None)
+            else:
+                st.session_state.video_job = get_jobs().submit(process_video, upload_path, sampler=sampler,
+                                                               region=region, source=uploaded_file.name,
+                                                               cascade=cascade, content_hash=content_hash,
+                                                               holds=[upload_path])
+                st.query_params["job"] = st.session_state.video_job
         
+        # Files this session shows stay out of the janitor's reach while it is open
+        hold(st.session_state.upload_path, LEASE_SECONDS)
         st.subheader("Original Uploaded Video")
-        st.video(tfile.name)
+        # Without the file server, st.video copies the whole file into memory
+        # on every rerun, so it is only shown on request
+        upload_url = file_url(st.session_state.upload_path)
+        if upload_url:
+            st.video(upload_url)
+        elif st.toggle("Show the uploaded video"):
+            st.video(st.session_state.upload_path)
+    
+    job = get_jobs().get(st.session_state.video_job) if st.session_state.video_job else None
+    if st.session_state.processed_data is None and job is not None:
+        if job.active:
+            st.subheader("Live Detection")
+            show_job_progress(job)
+            time.sleep(VIDEO_POLL_INTERVAL)
+            st.rerun()
+        elif job.status == DONE:
+            st.session_state.processed_data = job.result
+    
+    if st.session_state.processed_data is not None and not os.path.exists(st.session_state.processed_data["video"]):
+        # Swept from disk (e.g. a session left open past its lease): forget
+        # the result so the upload, if still selected, is processed again
+        st.session_state.processed_data = None
+        st.session_state.processed_upload = None
+        st.session_state.video_job = None
+        st.query_params.pop("job", None)
+        if uploaded_file is not None:
+            st.rerun()
+        st.error("The processed video is no longer available. Please upload the video again.")
+    elif st.session_state.processed_data is not None:
+        hold(st.session_state.processed_data["video"], LEASE_SECONDS)
+        st.success("Video processed successfully!")
+        st.caption(f"Detection ran on {st.session_state.processed_data['inferred_frames']} of "
+                   f"{st.session_state.processed_data['frames']} frames; "
+                   f"{st.session_state.processed_data['violation_frames']} frame(s) show missing PPE.")
+        if st.session_state.processed_data.get("cascade"):
+            st.caption(cascade_summary(st.session_state.processed_data["cascade"]))
         
-        if st.session_state.processed_data is None:
-            with st.spinner("Processing video, please wait..."):
-                st.session_state.processed_data = process_video(tfile.name)
+        st.markdown("#### Detection Summary (summed over frames):")
+        for cls, count in st.session_state.processed_data["counts"].items():
+            if count > 0:
+                st.write(f"**{cls.capitalize()}:** {count}")
         
-        if st.session_state.processed_data is not None:
-            st.success("Video processed successfully!")
-            
-            with open(st.session_state.processed_data["video"], "rb") as f:
-                processed_video_bytes = f.read()
+        # One alert per worker per violation episode, not per frame
+        alerts = violation_alerts(st.session_state.processed_data["violations"])
+        if alerts:
+            for a in alerts:
+                st.error(a)
+            st.markdown("#### Violation Events:")
+            st.dataframe([{"Worker": event["worker"] if event["worker"] is not None else "unassigned",
+                           "Missing": event["class"], "Start (s)": event["start"], "End (s)": event["end"]}
+                          for event in st.session_state.processed_data["events"]],
+                         use_container_width=True)
+        else:
+            st.success("All required PPE detected!")
+        
+        with st.expander("Processing time by stage"):
+            st.dataframe([{"Stage": stage, "Seconds": round(seconds, 2)}
+                          for stage, seconds in st.session_state.processed_data["timings"].items()],
+                         use_container_width=True)
+        
+        # Hand the browser a link to the file on disk when the file server is
+        # running. Otherwise Streamlit needs the whole file in memory, so it
+        # is read only in the rerun where the user asks for it, and the
+        # download itself does not trigger another rerun.
+        download_url = file_url(st.session_state.processed_data["video"], "processed_video.mp4", download=True)
+        if download_url:
+            st.link_button("Download Processed Video", download_url)
+        elif st.button("Prepare Download"):
+            with metrics.timed("read", mode="video"), open(st.session_state.processed_data["video"], "rb") as f:
+                data = f.read()
             st.download_button(
                 label="Download Processed Video",
-                data=processed_video_bytes,
+                data=data,
                 file_name="processed_video.mp4",
-                mime="video/mp4"
+                mime="video/mp4",
+                on_click="ignore"
             )
-            
-            st.subheader("Recommendations")
-            st.markdown("""
-            - **Lighting & Angle:** Ensure that the camera angle and lighting offer a clear view of the personnel.
-            - **Model Calibration:** Adjust the detection confidence threshold if you experience too many false positives or negatives.
-            - **Training Data:** Include varied examples of PPE in different environments to improve detection accuracy.
-            - **Regular Updates:** Periodically update the model with new data to adapt to changing conditions on-site.
-            """)
-        else:
-            st.error("Error: Could not locate the processed video. Please try again.")
+        
+        st.subheader("Recommendations")
+        st.markdown("""
+        - **Lighting & Angle:** Ensure that the camera angle and lighting offer a clear view of the personnel.
+        - **Model Calibration:** Adjust the detection confidence threshold if you experience too many false positives or negatives.
+        - **Training Data:** Include varied examples of PPE in different environments to improve detection accuracy.
+        - **Regular Updates:** Periodically update the model with new data to adapt to changing conditions on-site.
+        """)
+    elif job is not None and job.status == FAILED:
+        st.error(f"Error: Video processing failed ({job.error}). Please try again.")
+    elif job is not None and job.status == CANCELLED:
+        st.info("Video processing was cancelled.")
+    elif st.session_state.video_job is not None:
+        st.error("Error: Could not locate the processed video. Please try again.")
 
 elif pages[page_choice] == "image":
+    with metrics.timed("import", page="image"):
+        from visionarmor.detection import process_image
+        from visionarmor.tiling import Tiler
+        from visionarmor.cascade import Cascade
+    
     st.title("PPE Detection System - Image")
     st.write("Upload an image file (JPG or PNG) to detect PPE using the YOLOv8 model.")
     
     uploaded_image = st.file_uploader("Choose an image file", type=["jpg", "png"])
     
+    st.sidebar.markdown("### Large Images")
+    sliced = st.sidebar.checkbox("Sliced inference (drone / wide-angle images)", value=False)
+    tile_size = st.sidebar.select_slider("Tile size (pixels)", options=[320, 480, 640, 800, 960, 1280],
+                                         value=640, disabled=not sliced)
+    tile_overlap = st.sidebar.slider("Tile overlap (%)", min_value=0, max_value=50, value=20,
+                                     disabled=not sliced)
+    region = region_sidebar()
+    st.sidebar.markdown("### Model Cascade")
+    use_cascade = st.sidebar.checkbox("Screen with a fast model first", value=False)
+    
     if uploaded_image is not None:
-        img_temp = tempfile.NamedTemporaryFile(delete=False, suffix="." + uploaded_image.name.split('.')[-1])
-        img_temp.write(uploaded_image.read())
-        img_temp.flush()
+        with metrics.request_trace() as upload_trace, metrics.timed("upload", mode="image"):
+            image_path = spool_upload(uploaded_image, "." + uploaded_image.name.split('.')[-1])
         
         st.markdown("<h4>Uploaded Image:</h4>", unsafe_allow_html=True)
-        st.image(img_temp.name, use_container_width=True)
+        st.image(image_path, use_container_width=True)
         
-        with st.spinner("Processing image, please wait..."):
-            processed_img, detection_info = process_image(img_temp.name)
+        cascade = Cascade() if use_cascade else None
+        with st.spinner("Processing image, please wait..."), metrics.request_trace() as trace:
+            processed_img, detection_info = process_image(
+                image_path, tiler=Tiler(tile_size, tile_overlap / 100) if sliced else None, region=region,
+                source=uploaded_image.name, cascade=cascade)
         
         if processed_img:
             st.markdown("<h4>Detected Results:</h4>", unsafe_allow_html=True)
@@ -243,24 +390,184 @@ elif pages[page_choice] == "image":
             for cls, count in detection_info.items():
                 if count > 0:
                     st.write(f"**{cls.capitalize()}:** {count}")
+            # Cached results were not screened again, so there is nothing to report for them
+            if cascade is not None and cascade.stats()["frames"]:
+                st.caption(cascade_summary(cascade.stats()))
             
             # Trigger alerts for missing PPE based on "no-" classes
-            alerts = []
-            if detection_info["no-hardhat"] > 0:
-                alerts.append(f"Warning: {detection_info['no-hardhat']} person(s) without a hardhat detected!")
-            if detection_info["no-mask"] > 0:
-                alerts.append(f"Warning: {detection_info['no-mask']} person(s) without a mask detected!")
-            if detection_info["no-safety vest"] > 0:
-                alerts.append(f"Warning: {detection_info['no-safety vest']} person(s) without a safety vest detected!")
+            alerts = violation_alerts(detection_info)
             
             if alerts:
                 for a in alerts:
                     st.error(a)
             else:
                 st.success("All required PPE detected!")
+            
+            with st.expander("Processing time by stage"):
+                st.dataframe([{"Stage": stage, "Seconds": round(seconds, 3)} for stage, seconds in upload_trace + trace],
+                             use_container_width=True)
         else:
             st.error("Error: Could not process the image. Please try again.")
 
+elif pages[page_choice] == "bulk":
+    with metrics.timed("import", page="bulk"):
+        from visionarmor.batch import (DEFAULT_BATCH_SIZE, expand_uploads, process_images,
+                                       summarize, summary_rows, to_csv, zip_annotated)
+    
+    st.title("PPE Detection System - Bulk Images")
+    st.write("Upload many image files (JPG or PNG) or a ZIP archive of images to audit them in batches.")
+    
+    uploaded_files = st.file_uploader("Choose image files or a ZIP archive", type=["jpg", "png", "zip"],
+                                      accept_multiple_files=True)
+    batch_size = st.sidebar.slider("Batch size", min_value=1, max_value=64, value=DEFAULT_BATCH_SIZE)
+    # Drawing and encoding every image costs about as much as detection itself
+    annotate = st.sidebar.checkbox("Save annotated images (ZIP download)", value=False)
+    
+    if "bulk_outputs" not in st.session_state:
+        st.session_state.bulk_outputs = None
+    
+    if uploaded_files and st.button("Run Detection"):
+        images = expand_uploads([(f.name, f.getvalue()) for f in uploaded_files])
+        if not images:
+            st.session_state.bulk_outputs = None
+            st.error("Error: No JPG or PNG images found in the upload.")
+        else:
+            with st.spinner(f"Processing {len(images)} images, please wait..."):
+                st.session_state.bulk_outputs = process_images(images, new_output_dir(),
+                                                               batch_size=batch_size, annotate=annotate)
+    
+    outputs = st.session_state.bulk_outputs
+    if uploaded_files and outputs:
+        st.success(f"Processed {len(outputs)} images.")
+        unreadable = [entry["name"] for entry in outputs if not entry["read"]]
+        if unreadable:
+            st.warning(f"Could not read {len(unreadable)} file(s): {', '.join(unreadable)}")
+        
+        st.markdown("#### Detection Summary:")
+        totals = summarize(outputs)
+        for cls, count in totals.items():
+            if count > 0:
+                st.write(f"**{cls.capitalize()}:** {count}")
+        
+        flagged = sum(1 for entry in outputs
+                      if any(entry["detection_info"][cls] > 0
+                             for cls in VIOLATION_CLASSES))
+        if flagged:
+            st.error(f"Warning: {flagged} image(s) show missing PPE!")
+        else:
+            st.success("All required PPE detected!")
+        
+        st.markdown("#### Per-Image Results:")
+        st.dataframe(summary_rows(outputs), use_container_width=True)
+        st.download_button(
+            label="Download CSV",
+            data=to_csv(outputs),
+            file_name="detection_summary.csv",
+            mime="text/csv"
+        )
+        annotated = [entry["image"] for entry in outputs if entry["image"] is not None]
+        if annotated and all(os.path.exists(path) for path in annotated):
+            archive = os.path.join(os.path.dirname(annotated[0]), "annotated_images.zip")
+            if not os.path.exists(archive):
+                zip_annotated(outputs, archive)
+            hold(archive, LEASE_SECONDS)
+            download_url = file_url(archive, download=True)
+            if download_url:
+                st.link_button("Download Annotated Images", download_url)
+            elif st.button("Prepare Annotated Images"):
+                with open(archive, "rb") as f:
+                    data = f.read()
+                st.download_button(
+                    label="Download Annotated Images",
+                    data=data,
+                    file_name="annotated_images.zip",
+                    mime="application/zip",
+                    on_click="ignore"
+                )
+
+elif pages[page_choice] == "cameras":
+    with metrics.timed("import", page="cameras"):
+        from visionarmor.cameras import get_monitor, start_monitor, stop_monitor
+    
+    st.title("PPE Detection System - Live Cameras")
+    st.write("Monitor several site cameras (RTSP/HTTP URLs or video files) with one shared model.")
+    
+    sources = st.sidebar.text_area("Camera sources (one per line)")
+    target_fps = st.sidebar.slider("Detection FPS per camera", min_value=0.5, max_value=15.0, value=5.0, step=0.5)
+    regions_text = st.sidebar.text_area("Regions of interest (JSON, keyed by source)",
+                                        placeholder='{"rtsp://camera-1/stream": {"include": [...], "exclude": [...]}}')
+    start_col, stop_col = st.sidebar.columns(2)
+    if start_col.button("Start"):
+        source_list = [line.strip() for line in sources.splitlines() if line.strip()]
+        try:
+            regions = {source: RegionMask.from_dict(config)
+                       for source, config in json.loads(regions_text or "{}").items()}
+        except (ValueError, TypeError, AttributeError) as exc:
+            st.error(f"Error: Invalid regions ({exc}).")
+        else:
+            if source_list:
+                start_monitor(source_list, target_fps=target_fps, regions=regions)
+            else:
+                st.error("Error: Enter at least one camera source.")
+    if stop_col.button("Stop"):
+        stop_monitor()
+    
+    monitor = get_monitor()
+    if monitor is None:
+        st.info("No cameras are being monitored.")
+    else:
+        columns = st.columns(2)
+        for i, camera in enumerate(monitor.cameras):
+            with columns[i % 2]:
+                st.markdown(f"**{camera.name}**")
+                latest = camera.latest
+                if latest is None:
+                    st.caption(f"Error: {camera.error}" if camera.error else "Waiting for frames...")
+                    continue
+                frame, result, counts = latest
+                st.image(result.plot(img=frame), channels="BGR", use_container_width=True)
+                for a in violation_alerts(counts):
+                    st.error(a)
+        st.markdown("#### Stream Statistics:")
+        stats = monitor.stats()
+        if stats["last_error"]:
+            st.warning(f"{stats['errors']} detection batch(es) failed, most recently: {stats['last_error']}")
+        st.dataframe(stats["cameras"], use_container_width=True)
+        time.sleep(CAMERA_POLL_INTERVAL)
+        st.rerun()
+
+elif pages[page_choice] == "history":
+    import pandas as pd
+    
+    st.title("PPE Detection System - Violation History")
+    st.write("Violations recorded from image and video uploads and live cameras.")
+    
+    events = get_events()
+    periods = {"Last 24 hours": (86400, "hour"), "Last 7 days": (7 * 86400, "day"), "Last 30 days": (30 * 86400, "day")}
+    period = st.sidebar.selectbox("Period", list(periods.keys()))
+    source = st.sidebar.selectbox("Source", ["All"] + events.sources())
+    cls = st.sidebar.selectbox("Missing", ["All"] + list(VIOLATION_CLASSES))
+    span, bucket = periods[period]
+    start = time.time() - span
+    filters = {"source": None if source == "All" else source, "cls": None if cls == "All" else cls}
+    
+    st.metric("Violations", events.total_violations(start=start, **filters))
+    rows = [row for row in events.rollup(bucket, start=start // PERIODS[bucket] * PERIODS[bucket], **filters)
+            if row["class"] in VIOLATION_CLASSES]
+    if rows:
+        chart = pd.DataFrame(rows)
+        chart["time"] = pd.to_datetime(chart["bucket"], unit="s")
+        st.bar_chart(chart.pivot_table(index="time", columns="class", values="violations", aggfunc="sum"))
+        st.markdown("#### Latest Violations:")
+        st.dataframe([{"Time": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(event["ts"])),
+                       "Source": event["source"], "Missing": event["class"],
+                       "Worker": event["worker"] if event["worker"] is not None else "",
+                       "Count": event["count"]}
+                      for event in events.violations(start=start, **filters)],
+                     use_container_width=True)
+    else:
+        st.info("No violations recorded in this period.")
+
 elif pages[page_choice] == "blog":
     st.title("Safety Measures Blog")
     st.markdown("""
@@ -0,0 +1,120 @@
+"""
+Shared test helpers.
+
+The tests run the real ultralytics `Results` / `Boxes` classes (and torch)
+but no network weights: `PaintedModel` stands in for the detector and finds
+rectangles painted into the image, so crops, tiles and escalations see the
+same objects the real model would.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("ultralytics")
+
+import cv2  # noqa: E402
+
+from visionarmor.results import boxes_result  # noqa: E402
+
+# The id -> name mapping of the bundled weights
+NAMES = {0: 'Hardhat', 1: 'Mask', 2: 'NO-Hardhat', 3: 'NO-Mask', 4: 'NO-Safety Vest',
+         5: 'Person', 6: 'Safety Cone', 7: 'Safety Vest', 8: 'machinery', 9: 'vehicle'}
+PERSON, NO_HARDHAT = 5, 2
+
+
+def read_frames(path):
+    cap = cv2.VideoCapture(path)
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        yield frame
+    cap.release()
+
+
+def write_video(path, frames, fps=10):
+    """Write BGR `frames` to a losslessly encoded AVI at `path`, so painted objects survive."""
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"FFV1"), fps, (width, height))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+def paint(image, cls, x0, y0, x1, y1):
+    """Paint an object of class id `cls` into `image` for `PaintedModel` to find."""
+    image[y0:y1, x0:x1, 0] = 20 * (cls + 1)
+
+
+class PaintedModel:
+    """
+    Stand-in detector: returns one box per painted rectangle in each source,
+    with confidence `conf`, as a `Results` like the real model's.
+    """
+
+    names = NAMES
+
+    def __init__(self, conf=0.9):
+        self.conf = conf
+        self.calls = 0
+
+    def predict(self, source=None, **kwargs):
+        self.calls += 1
+        if isinstance(source, str) and source.endswith((".avi", ".mp4")):
+            sources = read_frames(source)
+        else:
+            sources = source if isinstance(source, list) else [source]
+        results = (self._detect(cv2.imread(image) if isinstance(image, str) else image) for image in sources)
+        return results if kwargs.get("stream") else list(results)
+
+    def _detect(self, image):
+        rows = []
+        for cls in NAMES:
+            mask = (image[..., 0] == 20 * (cls + 1)).astype(np.uint8)
+            _, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+            for x, y, w, h, _ in stats[1:]:
+                rows.append([x, y, x + w, y + h, self.conf, cls])
+        return boxes_result(image, "image.jpg", NAMES, np.array(rows, dtype=np.float32).reshape(-1, 6))
+
+
+@pytest.fixture
+def model():
+    return PaintedModel()
+
+
+class RecordedEvents:
+    """Stand-in for the event history; keeps what was recorded."""
+
+    def __init__(self):
+        self.images = []
+        self.videos = []
+
+    def record_image(self, source, detection_info):
+        self.images.append((source, detection_info))
+
+    def record_video(self, source, timeline, fps, events, ts=None):
+        self.videos.append((source, len(timeline), len(events)))
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch, model):
+    """
+    Run `visionarmor.detection` in `tmp_path` with `model` as the detector,
+    an empty result cache and recorded events. Returns the events.
+    """
+    from visionarmor import detection, streaming
+    from visionarmor.cache import ResultCache
+    from visionarmor.models import DEFAULT_WEIGHTS
+
+    monkeypatch.chdir(tmp_path)
+    weights = tmp_path / DEFAULT_WEIGHTS
+    weights.parent.mkdir(parents=True)
+    weights.write_bytes(b"weights")
+    events = RecordedEvents()
+    cache = ResultCache(root=str(tmp_path / "cache"))
+    monkeypatch.setattr(detection, "get_model", lambda: model)
+    monkeypatch.setattr(streaming, "get_model", lambda: model)
+    monkeypatch.setattr(detection, "get_cache", lambda: cache)
+    monkeypatch.setattr(detection, "get_events", lambda: events)
+    return events
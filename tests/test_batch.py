@@ -0,0 +1,31 @@
+import zipfile
+
+import cv2
+import numpy as np
+
+from tests.conftest import NO_HARDHAT, PERSON, paint
+from visionarmor.batch import process_images, summarize, zip_annotated
+
+
+def uploads():
+    image = np.zeros((240, 320, 3), dtype=np.uint8)
+    paint(image, PERSON, 50, 50, 100, 200)
+    paint(image, NO_HARDHAT, 55, 50, 95, 80)
+    data = cv2.imencode(".png", image)[1].tobytes()
+    return [("a.png", data), ("broken.png", b"not an image"), ("b.png", data)]
+
+
+def test_process_images_counts_without_annotating(tmp_path, model):
+    outputs = process_images(uploads(), str(tmp_path), batch_size=2, model=model, annotate=False)
+    assert [entry["read"] for entry in outputs] == [True, False, True]
+    assert all(entry["image"] is None for entry in outputs)
+    assert summarize(outputs)["no-hardhat"] == 2
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_annotated_images_zip(tmp_path, model):
+    outputs = process_images(uploads(), str(tmp_path), batch_size=2, model=model)
+    assert [entry["image"] is not None for entry in outputs] == [True, False, True]
+    archive = zip_annotated(outputs, str(tmp_path / "annotated.zip"))
+    with zipfile.ZipFile(archive) as f:
+        assert f.namelist() == ["00000_a.png", "00001_b.png"]
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from tests.conftest import NO_HARDHAT, PERSON, paint
+from visionarmor.benchmark import _ap, evaluate
+from visionarmor.counting import TARGET_INDEX
+
+
+def sample(*objects, size=(480, 640)):
+    """An image with `(cls, x0, y0, x1, y1)` objects painted in, and its labels."""
+    height, width = size
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    for cls, *box in objects:
+        paint(image, cls, *box)
+    classes = np.array([cls for cls, *_ in objects], dtype=np.intp)
+    boxes = np.array([box for _, *box in objects], dtype=np.float32).reshape(-1, 4) / [width, height, width, height]
+    return image, classes, boxes
+
+
+def test_ap_of_a_perfect_ranking_is_one():
+    assert _ap(np.array([0.5, 1.0]), np.array([1.0, 1.0])) == 1.0
+
+
+def test_ap_without_predictions_is_zero():
+    assert _ap(np.zeros(0), np.zeros(0)) == 0.0
+
+
+def test_ap_integrates_the_precision_envelope():
+    # Recall 0.5 at precision 1, then a false positive, then recall 1 at precision 2/3
+    assert _ap(np.array([0.5, 0.5, 1.0]), np.array([1.0, 0.5, 2 / 3])) == pytest.approx(0.5 + 0.5 * 2 / 3)
+
+
+def test_evaluate_perfect_detector(model):
+    samples = [sample((PERSON, 50, 100, 150, 400), (NO_HARDHAT, 300, 50, 340, 90)),
+               sample((PERSON, 400, 200, 500, 450))]
+    accuracy = evaluate(model, samples, imgsz=640)
+    assert accuracy["mAP50"] == 1.0
+    assert accuracy["mAP50_95"] == 1.0
+
+
+def test_evaluate_unpredicted_class_scores_zero(model):
+    image, classes, boxes = sample((PERSON, 50, 100, 150, 400))
+    # A labelled hardhat that is not in the image, so it is never predicted
+    classes = np.append(classes, TARGET_INDEX["hardhat"])
+    boxes = np.vstack([boxes, [[0.5, 0.1, 0.6, 0.2]]])
+    accuracy = evaluate(model, [(image, classes, boxes)], imgsz=640)
+    assert accuracy["AP50_per_class"] == {"hardhat": 0.0, "person": 1.0}
+    assert accuracy["mAP50"] == 0.5
@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+
+from tests.conftest import PERSON, paint
+from visionarmor import cameras
+from visionarmor.cameras import CameraStream, InferenceScheduler
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_unreadable_looping_file_backs_off(tmp_path, monkeypatch):
+    opened = []
+    capture = cameras.cv2.VideoCapture
+    monkeypatch.setattr(cameras.cv2, "VideoCapture", lambda source: opened.append(source) or capture(source))
+    camera = CameraStream(str(tmp_path / "missing.mp4"), loop=True).start()
+    try:
+        assert wait_for(lambda: camera.error is not None)
+        time.sleep(0.2)
+        assert len(opened) == 1
+        assert camera.stats()["error"] == f"no frames from {camera.source}"
+    finally:
+        camera.stop()
+        camera.join()
+
+
+class FlakyModel:
+    """Fails its first `predict` call, then delegates to `model`."""
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+
+    def predict(self, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("CUDA out of memory")
+        return self.model.predict(**kwargs)
+
+
+def test_scheduler_survives_a_failing_batch(model):
+    camera = CameraStream("rtsp://camera-1/stream", target_fps=0)
+    scheduler = InferenceScheduler([camera], model=FlakyModel(model))
+    scheduler._thread.start()  # frames are pushed by hand, not captured
+    try:
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        paint(frame, PERSON, 50, 100, 150, 400)
+        camera.push(frame)
+        assert wait_for(lambda: scheduler.errors == 1)
+        camera.push(frame)
+        assert wait_for(lambda: camera.inferred == 1)
+    finally:
+        scheduler.stop()
+        scheduler.join()
+    stats = scheduler.stats()
+    assert stats["batches"] == 1
+    assert stats["last_error"] == "RuntimeError: CUDA out of memory"
+    assert camera.latest[2]["person"] == 1
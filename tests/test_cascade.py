@@ -0,0 +1,33 @@
+import numpy as np
+
+from tests.conftest import NO_HARDHAT, PERSON, PaintedModel, paint
+from visionarmor.cascade import Cascade
+from visionarmor.results import count_classes
+
+
+def site_image():
+    image = np.zeros((480, 640, 3), dtype=np.uint8)
+    paint(image, PERSON, 50, 100, 150, 400)
+    paint(image, NO_HARDHAT, 60, 100, 140, 160)
+    return image
+
+
+def test_confident_frame_is_not_escalated():
+    full = PaintedModel()
+    cascade = Cascade(full=full, screen=PaintedModel(conf=0.9), escalate_violations=False, audit_every=0)
+    counts = count_classes(cascade.predict(source=site_image())[0])
+    assert counts["person"] == 1
+    assert full.calls == 0
+    assert cascade.stats()["escalated"] == 0
+
+
+def test_uncertain_frame_is_escalated_and_merged():
+    full = PaintedModel()
+    cascade = Cascade(full=full, screen=PaintedModel(conf=0.4), audit_every=0)
+    result = cascade.predict(source=site_image())[0]
+    counts = count_classes(result)
+    assert counts["person"] == 1
+    assert counts["no-hardhat"] == 1
+    assert full.calls == 1
+    assert cascade.stats()["escalation_rate"] == 1.0
+    np.testing.assert_allclose(result.boxes.conf.cpu().numpy(), [0.9, 0.9])  # the full model's boxes
@@ -0,0 +1,30 @@
+import numpy as np
+
+from tests.conftest import NO_HARDHAT, PERSON, paint, write_video
+from visionarmor.cache import file_hash
+from visionarmor.detection import cached_video, process_video
+
+
+def clip(path, frames=6):
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    paint(frame, PERSON, 50, 50, 100, 200)
+    paint(frame, NO_HARDHAT, 55, 50, 95, 80)
+    return write_video(path, [frame] * frames)
+
+
+def test_cached_video_only_after_processing(tmp_path, pipeline, model):
+    video_path = clip(tmp_path / "site.avi")
+    content_hash = file_hash(video_path)
+    assert cached_video(video_path, content_hash=content_hash) is None
+    assert model.calls == 0
+
+    processed = process_video(video_path, pipelined=False, content_hash=content_hash)
+    assert processed["frames"] == 6
+    assert processed["counts"]["no-hardhat"] == 6
+    assert pipeline.videos == [("site.avi", 6, 1)]
+
+    calls = model.calls
+    hit = cached_video(video_path)
+    assert hit["counts"] == processed["counts"]
+    assert hit["violations"] == processed["violations"]
+    assert model.calls == calls
@@ -0,0 +1,54 @@
+import threading
+
+from visionarmor import jobs
+from visionarmor.jobs import CANCELLED, DONE, JobManager
+
+
+def frames(count, started=None, release=None, on_frame=None):
+    """A stand-in for `process_video`: reports `count` frames, optionally pausing after the first."""
+    for i in range(count):
+        on_frame({"index": i, "total": count})
+        if i == 0 and started is not None:
+            started.set()
+            release.wait(5)
+    return count
+
+
+def test_job_runs_to_completion():
+    manager = JobManager(max_workers=1)
+    job = manager.get(manager.submit(frames, 3))
+    job.future.result(timeout=5)
+    assert job.status == DONE
+    assert job.result == 3
+    assert not manager.cancel(job.id)
+
+
+def test_cancel_running_job_stops_at_next_frame():
+    manager = JobManager(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    job = manager.get(manager.submit(frames, 100, started, release))
+    assert started.wait(5)
+    assert manager.cancel(job.id)
+    release.set()
+    job.future.result(timeout=5)
+    assert job.status == CANCELLED
+    assert job.frames_done == 1
+    assert job.result is None
+
+
+def test_cancel_queued_job_never_runs_and_releases_holds(monkeypatch):
+    released = []
+    monkeypatch.setattr(jobs, "hold", lambda path: None)
+    monkeypatch.setattr(jobs, "release", released.append)
+    manager = JobManager(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    running = manager.get(manager.submit(frames, 2, started, release))
+    assert started.wait(5)
+    queued = manager.get(manager.submit(frames, 2, holds=["upload.mp4"]))
+    assert manager.cancel(queued.id)
+    release.set()
+    running.future.result(timeout=5)
+    assert queued.status == CANCELLED
+    assert queued.frames_done == 0
+    assert released == ["upload.mp4"]
+    assert manager.queue_position(queued.id) == 0
@@ -0,0 +1,37 @@
+import numpy as np
+
+from tests.conftest import NO_HARDHAT, PERSON, paint
+from visionarmor.regions import RegionMask, points_in_polygon
+from visionarmor.results import count_classes
+
+LEFT_HALF = [[0.0, 0.0], [0.5, 0.0], [0.5, 1.0], [0.0, 1.0]]
+
+
+def test_points_in_polygon():
+    inside = points_in_polygon([[0.25, 0.5], [0.75, 0.5]], LEFT_HALF)
+    assert inside.tolist() == [True, False]
+
+
+def test_region_counts_only_the_watched_area(model):
+    image = np.zeros((480, 640, 3), dtype=np.uint8)
+    paint(image, PERSON, 50, 100, 150, 400)
+    paint(image, NO_HARDHAT, 450, 100, 550, 200)
+    result = RegionMask(include=[LEFT_HALF]).predict(model, image)
+    counts = count_classes(result)
+    assert counts["person"] == 1
+    assert counts["no-hardhat"] == 0
+    np.testing.assert_allclose(result.boxes.xyxy.cpu().numpy(), [[50, 100, 150, 400]])
+
+
+def test_region_exclusion_zone(model):
+    image = np.zeros((480, 640, 3), dtype=np.uint8)
+    paint(image, PERSON, 50, 100, 150, 400)
+    exclude = [[0.0, 0.0], [0.3, 0.0], [0.3, 1.0], [0.0, 1.0]]
+    counts = count_classes(RegionMask(exclude=[exclude]).predict(model, image))
+    assert counts["person"] == 0
+
+
+def test_region_without_detections(model):
+    image = np.zeros((480, 640, 3), dtype=np.uint8)
+    counts = count_classes(RegionMask(include=[LEFT_HALF]).predict(model, image))
+    assert sum(counts.values()) == 0
@@ -0,0 +1,47 @@
+import os
+
+import cv2
+import numpy as np
+
+from tests.conftest import NO_HARDHAT, PERSON, paint
+from visionarmor.detection import process_image
+from visionarmor.regions import RegionMask
+from visionarmor.tiling import Tiler, tile_origins
+
+
+def test_tile_origins_cover_the_edge():
+    starts = tile_origins(2160, 640, 0.2)
+    assert starts[0] == 0
+    assert starts[-1] + 640 == 2160
+    assert (np.diff(starts) <= 512).all()
+    assert tile_origins(480, 640, 0.2).tolist() == [0]
+
+
+def write_4k(path):
+    image = np.zeros((2160, 3840, 3), dtype=np.uint8)
+    paint(image, PERSON, 3000, 1500, 3020, 1540)  # distant worker
+    paint(image, PERSON, 500, 100, 560, 220)  # across the seam of the first two tiles
+    paint(image, NO_HARDHAT, 1800, 1000, 1830, 1030)
+    cv2.imwrite(str(path), image)
+    return str(path)
+
+
+def test_process_image_tiled_4k(tmp_path, pipeline, model):
+    image_path = write_4k(tmp_path / "site.png")
+    processed, counts = process_image(image_path, tiler=Tiler())
+    assert os.path.exists(processed)
+    assert counts["person"] == 2
+    assert counts["no-hardhat"] == 1
+    assert pipeline.images == [("site.png", counts)]
+
+    calls = model.calls
+    assert process_image(image_path, tiler=Tiler())[1] == counts
+    assert model.calls == calls  # served from the cache
+
+
+def test_process_image_tiled_in_region(tmp_path, pipeline):
+    image_path = write_4k(tmp_path / "site.png")
+    right_half = [[0.5, 0.0], [1.0, 0.0], [1.0, 1.0], [0.5, 1.0]]
+    _, counts = process_image(image_path, tiler=Tiler(), region=RegionMask(include=[right_half]))
+    assert counts["person"] == 1
+    assert counts["no-hardhat"] == 0
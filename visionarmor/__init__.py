@@ -0,0 +1,3 @@
+"""
+VisionArmor: PPE detection helpers shared by the Streamlit app.
+"""
@@ -0,0 +1,5 @@
+import sys
+
+from visionarmor.cli import main
+
+sys.exit(main())
@@ -0,0 +1,214 @@
+"""
+Exported inference backends.
+
+Besides PyTorch, the detector can run from an exported copy of the weights:
+  - 'onnx': ONNX Runtime on the CPU, with a configurable intra-op thread count
+    (loading fails if the thread count cannot be applied).
+  - 'onnx-int8': the ONNX export with dynamically quantized INT8 weights.
+  - 'openvino': an OpenVINO IR export.
+
+Exports are written next to the `.pt` file and reused until the weights
+change. Exported models are loaded through ultralytics, so `predict` returns
+the same `Results` objects as the PyTorch path; `parity_check` compares the
+two on a set of images.
+
+    python -m visionarmor.backends export --backend onnx
+    python -m visionarmor.backends parity dataset/test/images --backend onnx --limit 50
+"""
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+from ultralytics import YOLO
+
+from visionarmor.counting import class_index_map
+from visionarmor.results import VIDEO_EXTENSIONS
+
+BACKENDS = ("torch", "onnx", "onnx-int8", "openvino")
+
+_export_lock = threading.Lock()
+
+
+def _fresh(artifact, weights):
+    return os.path.exists(artifact) and os.path.getmtime(artifact) >= os.path.getmtime(weights)
+
+
+def export_model(weights, backend, imgsz=640):
+    """Return the path of the exported model for `backend`, exporting it if missing or stale."""
+    if backend not in BACKENDS or backend == "torch":
+        raise ValueError(f"Unknown export backend: {backend}")
+    stem = os.path.splitext(weights)[0]
+    with _export_lock:
+        if backend == "onnx":
+            artifact = stem + ".onnx"
+            if not _fresh(artifact, weights):
+                artifact = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+            return artifact
+        if backend == "openvino":
+            artifact = stem + "_openvino_model"
+            if not _fresh(artifact, weights):
+                artifact = YOLO(weights).export(format="openvino", imgsz=imgsz, dynamic=True)
+            return artifact
+    # onnx-int8: quantize the regular ONNX export
+    source = export_model(weights, "onnx", imgsz)
+    artifact = stem + "-int8.onnx"
+    with _export_lock:
+        if not _fresh(artifact, source):
+            try:
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+            except ImportError as exc:
+                raise ImportError("The 'onnx-int8' backend requires onnxruntime (pip install onnxruntime)") from exc
+            quantize_dynamic(source, artifact, weight_type=QuantType.QUInt8)
+    return artifact
+
+
+class SharedModel:
+    """
+    An exported model shared by every session.
+
+    Exported runtimes hold a single inference session that is expensive to
+    create, so callers take turns on one predictor instead of each getting
+    their own copy. A `stream=True` call keeps its turn until the stream is
+    exhausted or closed.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = threading.Lock()
+
+    def predict(self, *args, **kwargs):
+        if kwargs.get("stream"):
+            return self._stream(args, kwargs)
+        with self._lock:
+            return self.model.predict(*args, **kwargs)
+
+    def _stream(self, args, kwargs):
+        with self._lock:
+            yield from self.model.predict(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+def load_exported(weights, backend, threads=None, imgsz=640):
+    """
+    Load the `backend` export of `weights` as a `SharedModel`, set up its
+    predictor and, for ONNX Runtime, apply the intra-op thread count.
+    """
+    artifact = export_model(weights, backend, imgsz)
+    model = YOLO(artifact, task="detect")
+    blank = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    model.predict(source=blank, imgsz=imgsz, verbose=False)
+    if threads and backend.startswith("onnx"):
+        _set_onnx_threads(model, artifact, threads)
+        model.predict(source=blank, imgsz=imgsz, verbose=False)
+        if _onnx_session(model).get_session_options().intra_op_num_threads != threads:
+            raise RuntimeError(f"ONNX Runtime is not running with {threads} threads")
+    return SharedModel(model)
+
+
+def _onnx_session(model):
+    """
+    The ONNX Runtime session the predictor runs. ultralytics builds it
+    without a way to pass `SessionOptions`; the versions pinned in
+    requirements.txt keep it on `AutoBackend.backend.session`.
+    """
+    import onnxruntime as ort
+
+    session = getattr(getattr(model.predictor.model, "backend", None), "session", None)
+    if not isinstance(session, ort.InferenceSession):
+        raise RuntimeError("Cannot set the ONNX Runtime thread count: this ultralytics version keeps its "
+                           "session elsewhere (see requirements.txt for the supported version)")
+    return session
+
+
+def _set_onnx_threads(model, artifact, threads):
+    """Replace the predictor's ONNX Runtime session with one using `threads` intra-op threads."""
+    import onnxruntime as ort
+
+    current = _onnx_session(model)
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    model.predictor.model.backend.session = ort.InferenceSession(artifact, options,
+                                                                 providers=current.get_providers())
+
+
+def _boxes(result):
+    boxes = result.boxes
+    if boxes is None or boxes.cls is None or len(boxes) == 0:
+        return np.zeros((0, 4)), np.zeros(0, dtype=np.intp), np.zeros(0)
+    mapped = class_index_map(result.names)[boxes.cls.cpu().numpy().astype(np.intp)]
+    return boxes.xyxy.cpu().numpy(), mapped, boxes.conf.cpu().numpy()
+
+
+def parity_check(image_paths, backend, weights=None, iou_threshold=0.5):
+    """
+    Run `image_paths` through PyTorch and `backend` and report how closely
+    the detections agree:
+      - 'images': images compared.
+      - 'count_mismatches': images whose per-class counts differ.
+      - 'matched' / 'unmatched': boxes paired by class and IoU >= `iou_threshold`, and the rest.
+      - 'mean_iou': mean IoU of matched boxes.
+      - 'max_conf_delta': largest confidence difference between matched boxes.
+    """
+    from visionarmor.counting import result_counts
+    from visionarmor.models import DEFAULT_WEIGHTS, get_model
+    from visionarmor.tracking import greedy_match, iou_matrix
+
+    weights = weights or DEFAULT_WEIGHTS
+    reference = get_model(weights, backend="torch")
+    candidate = get_model(weights, backend=backend)
+    report = {"backend": backend, "images": 0, "count_mismatches": 0, "matched": 0, "unmatched": 0,
+              "mean_iou": None, "max_conf_delta": 0.0}
+    ious = []
+    for path in image_paths:
+        ref = reference.predict(source=path, verbose=False)[0]
+        out = candidate.predict(source=path, verbose=False)[0]
+        report["images"] += 1
+        report["count_mismatches"] += bool((result_counts(ref) != result_counts(out)).any())
+        ref_xyxy, ref_cls, ref_conf = _boxes(ref)
+        out_xyxy, out_cls, out_conf = _boxes(out)
+        iou = iou_matrix(ref_xyxy, out_xyxy)
+        iou[ref_cls[:, None] != out_cls[None, :]] = 0.0
+        pairs = greedy_match(iou, iou_threshold)
+        for row, col in pairs:
+            ious.append(iou[row, col])
+            report["max_conf_delta"] = max(report["max_conf_delta"], abs(float(ref_conf[row] - out_conf[col])))
+        report["matched"] += len(pairs)
+        report["unmatched"] += len(ref_xyxy) + len(out_xyxy) - 2 * len(pairs)
+    if ious:
+        report["mean_iou"] = float(np.mean(ious))
+    return report
+
+
+def main(argv=None):
+    from visionarmor.cli import collect_inputs
+    from visionarmor.models import DEFAULT_WEIGHTS
+
+    parser = argparse.ArgumentParser(prog="python -m visionarmor.backends",
+                                     description="Export the detector and check backend parity.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="export the weights for a backend")
+    export.add_argument("--backend", choices=BACKENDS[1:], default="onnx")
+    export.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parity = sub.add_parser("parity", help="compare a backend against PyTorch")
+    parity.add_argument("inputs", nargs="+", help="image files, directories or glob patterns")
+    parity.add_argument("--backend", choices=BACKENDS[1:], default="onnx")
+    parity.add_argument("--weights", default=DEFAULT_WEIGHTS)
+    parity.add_argument("--limit", type=int, default=100, help="maximum number of images")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        print(export_model(args.weights, args.backend))
+        return 0
+    paths = [path for path in collect_inputs(args.inputs) if not path.lower().endswith(VIDEO_EXTENSIONS)]
+    report = parity_check(paths[:args.limit], args.backend, args.weights)
+    print(json.dumps(report, indent=2))
+    return 0 if report["count_mismatches"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
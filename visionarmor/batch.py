@@ -0,0 +1,125 @@
+"""
+Bulk image detection.
+
+Uploads (individual images or zip archives) are decoded in parallel and run
+through the model in fixed-size batches, one `predict` call per batch. Only
+one batch is decoded at a time, so memory grows with the batch size rather
+than with the number of uploads. Annotated copies are only drawn and
+encoded on request, and can be bundled into one ZIP for download.
+"""
+import csv
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from visionarmor.models import get_model
+from visionarmor.results import IMAGE_EXTENSIONS, TARGET_CLASSES, count_classes, save_annotated_image
+
+DEFAULT_BATCH_SIZE = 16
+
+
+def expand_uploads(files):
+    """
+    Turn a list of `(name, data)` pairs into a flat list of image pairs,
+    unpacking any zip archives and skipping entries that are not images.
+    """
+    images = []
+    for name, data in files:
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for member in archive.infolist():
+                    if not member.is_dir() and member.filename.lower().endswith(IMAGE_EXTENSIONS):
+                        images.append((member.filename, archive.read(member)))
+        elif name.lower().endswith(IMAGE_EXTENSIONS):
+            images.append((name, data))
+    return images
+
+
+def _decode(data):
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def decode_images(images, workers=None, pool=None):
+    """
+    Decode `(name, data)` pairs into BGR arrays on a thread pool (OpenCV
+    releases the GIL while decoding), or on `pool` if given. Files that
+    cannot be decoded are returned with `None` in place of the array.
+    """
+    if pool is None:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return decode_images(images, pool=pool)
+    frames = pool.map(_decode, [data for _, data in images])
+    return [(name, frame) for (name, _), frame in zip(images, frames)]
+
+
+def process_images(images, out_dir, batch_size=DEFAULT_BATCH_SIZE, workers=None, model=None, annotate=True):
+    """
+    Run detection over many images and return one dictionary per input:
+      - 'name': the uploaded file name.
+      - 'read': whether the file could be decoded.
+      - 'image': path of the annotated image in `out_dir` (None if it could
+        not be read, or without `annotate`).
+      - 'detection_info': counts for each of the 10 classes.
+    """
+    model = model or get_model()
+    outputs = []
+    written = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(images), batch_size):
+            batch = []
+            for name, frame in decode_images(images[start:start + batch_size], pool=pool):
+                entry = {"name": name, "read": frame is not None, "image": None,
+                         "detection_info": {cls: 0 for cls in TARGET_CLASSES}}
+                outputs.append(entry)
+                if frame is not None:
+                    batch.append((entry, frame))
+            if not batch:
+                continue
+            results = model.predict(source=[frame for _, frame in batch], show=False,
+                                    save=False, verbose=False)
+            for (entry, _), result in zip(batch, results):
+                if annotate:
+                    filename = f"{written:05d}_{os.path.basename(entry['name'])}"
+                    entry["image"] = save_annotated_image(result, out_dir, filename)
+                    written += 1
+                entry["detection_info"] = count_classes(result)
+    return outputs
+
+
+def zip_annotated(outputs, path):
+    """
+    Bundle the annotated images of `outputs` into a ZIP archive at `path`
+    and return the path (JPEGs are stored, not compressed again).
+    """
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as archive:
+        for entry in outputs:
+            if entry["image"] is not None:
+                archive.write(entry["image"], os.path.basename(entry["image"]))
+    return path
+
+
+def summarize(outputs):
+    """Sum the per-image `detection_info` dictionaries into one total."""
+    totals = {cls: 0 for cls in TARGET_CLASSES}
+    for entry in outputs:
+        for cls, count in entry["detection_info"].items():
+            totals[cls] += count
+    return totals
+
+
+def summary_rows(outputs):
+    """One flat row per image (file name plus a column per class)."""
+    return [{"file": entry["name"], **entry["detection_info"]} for entry in outputs]
+
+
+def to_csv(outputs):
+    """Render `summary_rows(outputs)` as CSV text."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=["file"] + TARGET_CLASSES)
+    writer.writeheader()
+    writer.writerows(summary_rows(outputs))
+    return buffer.getvalue()
@@ -0,0 +1,373 @@
+"""
+Benchmark harness over the bundled dataset splits.
+
+Measures, for the configured backend:
+  - model load time,
+  - per-image latency percentiles (p50/p95/p99) at batch size 1,
+  - throughput (images/s) for several batch sizes and CPU thread counts,
+  - video throughput (frames/s) for the serial and pipelined paths, on a
+    clip assembled from the split's images,
+  - peak RSS,
+  - mAP@0.5 and mAP@0.5:0.95 against the split's YOLO labels,
+  - with `--cascade`, the same latency and accuracy through a `Cascade`
+    (see `visionarmor.cascade`), its escalation rate and its mAP change,
+
+and writes everything to a JSON file under `runs/benchmarks` so runs can be
+compared across commits. Ground truth comes from the label index
+(`visionarmor.dataset`); with `--cached-images`, images are read from its
+letterboxed image cache instead of being decoded on every run:
+
+    python -m visionarmor.benchmark --split test --batch-sizes 1,8,16 --threads 1,4
+    python -m visionarmor.benchmark --compare runs/benchmarks/<earlier>.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from visionarmor import models
+from visionarmor.cascade import SCREEN_WEIGHTS, Cascade
+from visionarmor.counting import TARGET_CLASSES, class_index_map
+from visionarmor.dataset import DATASET_ROOT, LabelIndex
+from visionarmor.results import IMAGE_EXTENSIONS, open_video_writer
+from visionarmor.tracking import iou_matrix
+
+BENCHMARK_ROOT = "runs/benchmarks"
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+def split_images(split, limit=None):
+    """Image paths of a dataset split, sorted, optionally truncated to `limit`."""
+    image_dir = os.path.join(DATASET_ROOT, split, "images")
+    paths = sorted(os.path.join(image_dir, name) for name in os.listdir(image_dir)
+                   if name.lower().endswith(IMAGE_EXTENSIONS))
+    return paths[:limit] if limit else paths
+
+
+def label_path(image_path):
+    """The YOLO label file that belongs to `image_path`."""
+    image_dir, name = os.path.split(image_path)
+    return os.path.join(os.path.dirname(image_dir), "labels", os.path.splitext(name)[0] + ".txt")
+
+
+def load_labels(image_path):
+    """Ground truth of one image as `(classes, xyxy)` with normalized coordinates."""
+    try:
+        with open(label_path(image_path)) as f:
+            rows = [line.split()[:5] for line in f if line.strip()]
+    except OSError:
+        rows = []
+    if not rows:
+        return np.zeros(0, dtype=np.intp), np.zeros((0, 4))
+    data = np.array(rows, dtype=float)
+    cls, xc, yc, w, h = data[:, 0].astype(np.intp), data[:, 1], data[:, 2], data[:, 3], data[:, 4]
+    return cls, np.stack([xc - w / 2, yc - h / 2, xc + w / 2, yc + h / 2], axis=1)
+
+
+def label_samples(paths):
+    """Yield `(path, classes, xyxy)` for `paths`, reading labels from the index where possible."""
+    index = LabelIndex.open_or_build()
+    for path in paths:
+        image_id = index.image_id(path)
+        yield (path,) + (index.labels(image_id) if image_id is not None else load_labels(path))
+
+
+def cached_samples(split, imgsz, limit=None):
+    """
+    Yield `(image, classes, xyxy)` from the letterboxed image cache, with the
+    labels mapped into the letterboxed frame (normalized to `imgsz`).
+    """
+    index = LabelIndex.open_or_build()
+    images, params = index.letterboxed(split, imgsz)
+    for row, image_id in enumerate(index.image_ids(split)[:limit]):
+        width, height = index.image_size[image_id]
+        scale, pad_x, pad_y = params[row]
+        gt_cls, gt_box = index.labels(image_id)
+        gt_box = (gt_box * (width, height, width, height) * scale + (pad_x, pad_y, pad_x, pad_y)) / imgsz
+        yield images[row], gt_cls, gt_box
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def percentiles(samples):
+    samples = np.asarray(samples) * 1000
+    return {"p50_ms": float(np.percentile(samples, 50)), "p95_ms": float(np.percentile(samples, 95)),
+            "p99_ms": float(np.percentile(samples, 99)), "mean_ms": float(samples.mean())}
+
+
+def set_threads(threads, backend):
+    """Apply a CPU thread count; exported backends are reloaded to pick it up."""
+    if backend == "torch":
+        import torch
+        torch.set_num_threads(threads)
+    else:
+        models.THREADS = threads
+        models.clear()
+
+
+def measure_load(weights, backend):
+    models.clear()
+    start = time.perf_counter()
+    models.get_model(weights, backend)
+    return time.perf_counter() - start
+
+
+def measure_latency(model, paths, imgsz):
+    samples = []
+    for path in paths:
+        start = time.perf_counter()
+        model.predict(source=path, imgsz=imgsz, verbose=False)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def measure_throughput(model, frames, batch_size, imgsz):
+    start = time.perf_counter()
+    for i in range(0, len(frames), batch_size):
+        model.predict(source=frames[i:i + batch_size], imgsz=imgsz, verbose=False)
+    return len(frames) / (time.perf_counter() - start)
+
+
+def measure_video(model, frames, imgsz, fps=25.0):
+    """Frames per second of `stream_video` with `model` on a clip built from `frames`, serial and pipelined."""
+    from visionarmor.streaming import stream_video
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = os.path.join(tmp, "clip.mp4")
+        size = (imgsz, imgsz)
+        writer = None
+        for frame in frames:
+            frame = cv2.resize(frame, size)
+            writer = writer or open_video_writer(clip, fps, frame)
+            writer.write(frame)
+        writer.release()
+        for name, pipelined in (("serial", False), ("pipelined", True)):
+            out_dir = tempfile.mkdtemp(dir=tmp)
+            start = time.perf_counter()
+            update = None
+            for update in stream_video(clip, out_dir, model=model, pipelined=pipelined, imgsz=imgsz):
+                pass
+            elapsed = time.perf_counter() - start
+            report[name] = {"fps": len(frames) / elapsed,
+                            "stages_s": {stage: round(t, 3) for stage, t in update["timings"].items()}}
+    return report
+
+
+def _ap(recall, precision):
+    """
+    Average precision: the area under the precision envelope (precision made
+    monotonically decreasing in recall), integrated over every recall step.
+    """
+    if len(recall) == 0:
+        return 0.0
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    steps = np.flatnonzero(mrec[1:] != mrec[:-1])
+    return float(np.sum((mrec[steps + 1] - mrec[steps]) * mpre[steps + 1]))
+
+
+def evaluate(model, samples, imgsz, conf=0.001):
+    """
+    mAP@0.5 and mAP@0.5:0.95 (mean over classes present in the labels), plus
+    per-class AP@0.5, over `(source, classes, xyxy)` samples.
+    """
+    tp_rows, conf_rows, cls_rows = [], [], []
+    gt_counts = np.zeros(len(TARGET_CLASSES), dtype=np.intp)
+    for source, gt_cls, gt_box in samples:
+        gt_counts += np.bincount(gt_cls, minlength=len(TARGET_CLASSES))
+        result = model.predict(source=source, imgsz=imgsz, conf=conf, verbose=False)[0]
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            continue
+        pred_cls = class_index_map(result.names)[boxes.cls.cpu().numpy().astype(np.intp)]
+        pred_conf = boxes.conf.cpu().numpy()
+        pred_box = boxes.xyxyn.cpu().numpy()
+        keep = pred_cls >= 0
+        pred_cls, pred_conf, pred_box = pred_cls[keep], pred_conf[keep], pred_box[keep]
+        order = np.argsort(-pred_conf)
+        pred_cls, pred_conf, pred_box = pred_cls[order], pred_conf[order], pred_box[order]
+        iou = iou_matrix(pred_box, gt_box)
+        iou[pred_cls[:, None] != gt_cls[None, :]] = 0.0
+        tp = np.zeros((len(pred_cls), len(IOU_THRESHOLDS)), dtype=bool)
+        for t, threshold in enumerate(IOU_THRESHOLDS):
+            taken = np.zeros(len(gt_cls), dtype=bool)
+            for i in range(len(pred_cls)):
+                candidates = np.where(taken, 0.0, iou[i])
+                if candidates.size and candidates.max() >= threshold:
+                    j = int(candidates.argmax())
+                    taken[j] = True
+                    tp[i, t] = True
+        tp_rows.append(tp)
+        conf_rows.append(pred_conf)
+        cls_rows.append(pred_cls)
+
+    tp = np.concatenate(tp_rows) if tp_rows else np.zeros((0, len(IOU_THRESHOLDS)), dtype=bool)
+    confs = np.concatenate(conf_rows) if conf_rows else np.zeros(0)
+    classes = np.concatenate(cls_rows) if cls_rows else np.zeros(0, dtype=np.intp)
+    ap = np.zeros((len(TARGET_CLASSES), len(IOU_THRESHOLDS)))
+    for c in np.flatnonzero(gt_counts):
+        mask = classes == c
+        if not mask.any():
+            continue  # labelled but never predicted: AP stays 0
+        order = np.argsort(-confs[mask])
+        hits = tp[mask][order]
+        tps = np.cumsum(hits, axis=0)
+        fps = np.cumsum(~hits, axis=0)
+        for t in range(len(IOU_THRESHOLDS)):
+            recall = tps[:, t] / gt_counts[c]
+            precision = tps[:, t] / np.maximum(tps[:, t] + fps[:, t], 1)
+            ap[c, t] = _ap(recall, precision)
+    present = gt_counts > 0
+    return {"mAP50": float(ap[present, 0].mean()) if present.any() else None,
+            "mAP50_95": float(ap[present].mean()) if present.any() else None,
+            "AP50_per_class": {TARGET_CLASSES[c]: round(float(ap[c, 0]), 4) for c in np.flatnonzero(present)}}
+
+
+def measure_cascade(args, backend, paths):
+    """Latency, escalation rate and (with `--map`) accuracy through a `Cascade` over the benchmarked model."""
+    def cascade():
+        # Accuracy is measured against the labels here, so no audit runs of the full model
+        return Cascade(full=models.get_model(args.weights, backend),
+                       screen=models.get_model(SCREEN_WEIGHTS, backend), audit_every=0)
+
+    timed = cascade()
+    report = {"screen_weights": SCREEN_WEIGHTS, "screen_imgsz": timed.screen_imgsz, "band": list(timed.band),
+              "latency": measure_latency(timed, paths, args.imgsz)}
+    report["escalation_rate"] = timed.stats()["escalation_rate"]
+    if args.map:
+        samples = (cached_samples(args.split, args.imgsz, args.limit) if args.cached_images
+                   else label_samples(paths))
+        report["accuracy"] = evaluate(cascade(), samples, args.imgsz)
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    backend = args.backend or models.DEFAULT_BACKEND
+    paths = split_images(args.split, args.limit)
+    report = {"commit": git_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "backend": backend,
+              "split": args.split, "images": len(paths), "imgsz": args.imgsz,
+              "cached_images": args.cached_images,
+              "platform": platform.platform(), "cpu_count": os.cpu_count()}
+
+    report["model_load_s"] = measure_load(args.weights, backend)
+    model = models.get_model(args.weights, backend)
+    model.predict(source=paths[0], imgsz=args.imgsz, verbose=False)  # warm-up
+    report["latency"] = measure_latency(model, paths, args.imgsz)
+
+    if args.cached_images:
+        frames = [np.asarray(image) for image, _, _ in cached_samples(args.split, args.imgsz, args.limit)]
+    else:
+        frames = [cv2.imread(path) for path in paths]
+    report["throughput"] = []
+    for threads in args.threads:
+        set_threads(threads, backend)
+        model = models.get_model(args.weights, backend)
+        for batch_size in args.batch_sizes:
+            report["throughput"].append({"threads": threads, "batch_size": batch_size,
+                                         "images_per_s": measure_throughput(model, frames, batch_size, args.imgsz)})
+    if args.video:
+        report["video"] = measure_video(models.get_model(args.weights, backend), frames, args.imgsz)
+    if args.map:
+        samples = (cached_samples(args.split, args.imgsz, args.limit) if args.cached_images
+                   else label_samples(paths))
+        report["accuracy"] = evaluate(models.get_model(args.weights, backend), samples, args.imgsz)
+    if args.cascade:
+        report["cascade"] = measure_cascade(args, backend, paths)
+        if "accuracy" in report["cascade"]:
+            full, screened = report["accuracy"], report["cascade"]["accuracy"]
+            report["cascade"]["mAP_delta"] = {key: screened[key] - full[key] for key in ("mAP50", "mAP50_95")
+                                              if screened[key] is not None and full[key] is not None}
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def compare(current, previous):
+    """Print the relative change of the headline numbers between two reports."""
+    def pairs():
+        yield "model_load_s", current["model_load_s"], previous["model_load_s"]
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            yield f"latency.{key}", current["latency"][key], previous["latency"][key]
+        old = {(row["threads"], row["batch_size"]): row["images_per_s"] for row in previous["throughput"]}
+        for row in current["throughput"]:
+            key = (row["threads"], row["batch_size"])
+            if key in old:
+                yield f"throughput[t={key[0]},b={key[1]}]", row["images_per_s"], old[key]
+        if "accuracy" in current and "accuracy" in previous:
+            for key in ("mAP50", "mAP50_95"):
+                yield f"accuracy.{key}", current["accuracy"][key], previous["accuracy"][key]
+        if "cascade" in current and "cascade" in previous:
+            new, old = current["cascade"], previous["cascade"]
+            yield "cascade.latency.p50_ms", new["latency"]["p50_ms"], old["latency"]["p50_ms"]
+            yield "cascade.escalation_rate", new["escalation_rate"], old["escalation_rate"]
+        yield "peak_rss_mb", current["peak_rss_mb"], previous["peak_rss_mb"]
+
+    print(f"Compared with {previous.get('commit')} ({previous.get('time')}):")
+    for name, new, old in pairs():
+        if new is None or old is None:
+            continue
+        change = (new - old) / old * 100 if old else float("nan")
+        print(f"  {name:32s} {old:12.3f} -> {new:12.3f}  ({change:+.1f}%)")
+
+
+def _int_list(text):
+    return [int(value) for value in text.split(",") if value]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m visionarmor.benchmark",
+                                     description="Benchmark PPE detection on the bundled dataset.")
+    parser.add_argument("--split", default="test", choices=["test", "valid", "train"])
+    parser.add_argument("--limit", type=int, help="use only the first N images of the split")
+    parser.add_argument("--weights", default=models.DEFAULT_WEIGHTS)
+    parser.add_argument("--backend", help="inference backend (default: VISIONARMOR_BACKEND or torch)")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--batch-sizes", type=_int_list, default=[1, 4, 8, 16])
+    parser.add_argument("--threads", type=_int_list, default=[os.cpu_count() or 1])
+    parser.add_argument("--no-video", dest="video", action="store_false", help="skip the video benchmark")
+    parser.add_argument("--no-map", dest="map", action="store_false", help="skip the accuracy evaluation")
+    parser.add_argument("--cached-images", action="store_true",
+                        help="read letterboxed images from the dataset index cache (built on first use)")
+    parser.add_argument("--cascade", action="store_true",
+                        help="also benchmark the fast-screening model cascade")
+    parser.add_argument("--output", help="result file (default: runs/benchmarks/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    output = args.output
+    if output is None:
+        os.makedirs(BENCHMARK_ROOT, exist_ok=True)
+        output = os.path.join(BENCHMARK_ROOT, f"{time.strftime('%Y%m%d-%H%M%S')}-{report['commit'] or 'nogit'}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    print(f"Saved to {output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,139 @@
+"""
+Content-addressed result cache.
+
+Results are keyed by the hash of the uploaded file, the hash of the model
+weights and the inference parameters, and stored on disk so every session
+(and every process on the box) can reuse them. The cache is bounded in size
+and evicts the least recently used entries first.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+CACHE_ROOT = os.environ.get("VISIONARMOR_CACHE_DIR", "runs/cache")
+CACHE_MAX_BYTES = int(os.environ.get("VISIONARMOR_CACHE_MAX_MB", "2048")) * 1024 * 1024
+
+_CHUNK = 1024 * 1024
+_META = "meta.json"
+_hash_memo = {}  # (path, mtime, size) -> sha256, for weights and other large, rarely changing files
+
+
+def file_hash(path, memoize=False):
+    """SHA-256 of a file, read in chunks so large videos never sit in memory."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+    if memoize and memo_key in _hash_memo:
+        return _hash_memo[memo_key]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            digest.update(chunk)
+    if memoize:
+        _hash_memo[memo_key] = digest.hexdigest()
+    return digest.hexdigest()
+
+
+def cache_key(content_hash, weights_hash, params):
+    """Combine the input hash, weights hash and inference parameters into one key."""
+    payload = json.dumps({"input": content_hash, "weights": weights_hash, "params": params},
+                         sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _dir_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of processed outputs.
+
+    Each entry is a directory named after its key holding the output files
+    and a `meta.json` with the detection data. Reading an entry refreshes the
+    modification time of its metadata, which is what eviction orders by.
+    """
+
+    def __init__(self, root=CACHE_ROOT, max_bytes=CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def get(self, key):
+        """
+        Return the stored metadata for `key` (with 'dir' set to the entry
+        directory), or None on a miss.
+        """
+        entry_dir = os.path.join(self.root, key)
+        meta_path = os.path.join(entry_dir, _META)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            return None
+        meta["dir"] = entry_dir
+        return meta
+
+    def put(self, key, files, meta):
+        """
+        Store copies of `files` (paths) and `meta` under `key` and return
+        the entry directory. File names inside the entry are the basenames of
+        `files`. The entry only becomes visible once it is fully written.
+        """
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+        for path in files:
+            shutil.copy2(path, os.path.join(staging, os.path.basename(path)))
+        with open(os.path.join(staging, _META), "w") as f:
+            json.dump(meta, f)
+        entry_dir = os.path.join(self.root, key)
+        with self._lock:
+            try:
+                os.rename(staging, entry_dir)
+            except OSError:
+                # Another session stored the same result first.
+                shutil.rmtree(staging, ignore_errors=True)
+            self._evict()
+        return entry_dir
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.root):
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            try:
+                last_used = os.path.getmtime(os.path.join(entry.path, _META))
+                size = _dir_size(entry.path)
+            except OSError:
+                continue
+            entries.append((last_used, size, entry.path))
+            total += size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+            os.makedirs(self.root, exist_ok=True)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_cache():
+    """The process-wide cache shared by all sessions."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ResultCache()
+        return _default
+
@@ -0,0 +1,337 @@
+"""
+Live multi-camera monitoring.
+
+Each `CameraStream` reads an RTSP/HTTP URL or a local file on its own I/O
+thread into a small drop-oldest buffer, so a slow detector never backs up
+the capture. An `InferenceScheduler` visits the cameras round-robin, takes
+the newest frame from every camera that is due under its target FPS, and
+runs them through the model as one batch per `predict` call.
+
+Local video files stand in for cameras (played back at their native frame
+rate), which makes the throughput and latency targets testable offline:
+
+    python -m visionarmor.cameras site1.mp4 site2.mp4 --fps 5 --duration 30
+"""
+import argparse
+import collections
+import json
+import logging
+import threading
+import time
+
+import cv2
+
+from visionarmor.events import get_events
+from visionarmor.models import get_model
+from visionarmor.regions import load_regions
+from visionarmor.results import count_classes
+from visionarmor.tracking import ViolationTracker
+
+RECONNECT_DELAY = 2.0
+
+logger = logging.getLogger(__name__)
+
+
+class CameraStream:
+    """
+    Capture frames from `source` on a background thread.
+
+    Only the newest `buffer_size` frames are kept; older ones are dropped
+    (and counted in `dropped`). Files are paced at their own frame rate
+    and replayed when `loop` is set; live sources reconnect after errors.
+    A source that yields no frames is retried every `RECONNECT_DELAY`
+    seconds and reported in `error` until it delivers again.
+    An optional `RegionMask` limits detection to the watched part of the view.
+
+    `tracker` follows violation episodes across inferred frames. Its frame
+    index counts ticks of `1 / target_fps` seconds since `origin` (wall
+    clock), so episode times stay right when inference falls behind.
+    """
+
+    def __init__(self, source, name=None, target_fps=5.0, buffer_size=2, loop=False, region=None):
+        self.source = source
+        self.name = name or str(source)
+        self.target_fps = target_fps
+        self.loop = loop
+        self.region = region
+        self.is_file = "://" not in str(source)
+        self.read = 0
+        self.dropped = 0
+        self.inferred = 0
+        self.latency_total = 0.0
+        self.last_scheduled = 0.0
+        self.latest = None  # (frame, result, counts) of the last inferred frame
+        self.error = None
+        self.tick_rate = target_fps or 25.0
+        self.tracker = ViolationTracker(self.tick_rate, min_gap_frames=2)
+        self.origin = None
+        self._buffer = collections.deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"camera-{self.name}", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    @property
+    def finished(self):
+        """True once a non-looping file source has been read to the end."""
+        return self._finished.is_set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            cap = cv2.VideoCapture(self.source)
+            interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 25.0) if self.is_file else 0.0
+            next_frame = time.monotonic()
+            frames = 0
+            while not self._stopped.is_set():
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                frames += 1
+                self.push(frame)
+                if interval:
+                    next_frame += interval
+                    time.sleep(max(next_frame - time.monotonic(), 0.0))
+            cap.release()
+            self.error = None if frames else f"no frames from {self.source}"
+            if self.is_file and not self.loop:
+                self._finished.set()
+                return
+            if not self.is_file or not frames:
+                self._stopped.wait(RECONNECT_DELAY)
+
+    def push(self, frame):
+        """Add a captured frame, dropping the oldest one when the buffer is full."""
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append((frame, time.monotonic()))
+            self.read += 1
+
+    def take_latest(self):
+        """Return `(frame, capture_time)` of the newest frame and clear the buffer, or None."""
+        with self._lock:
+            if not self._buffer:
+                return None
+            item = self._buffer.pop()
+            self.dropped += len(self._buffer)
+            self._buffer.clear()
+            return item
+
+    def due(self, now):
+        """Whether the camera's target FPS allows another inference at `now`."""
+        return not self.target_fps or now - self.last_scheduled >= 1.0 / self.target_fps
+
+    def stats(self):
+        return {"camera": self.name, "read": self.read, "dropped": self.dropped,
+                "inferred": self.inferred,
+                "mean_latency": self.latency_total / self.inferred if self.inferred else None,
+                "error": self.error}
+
+
+class InferenceScheduler:
+    """
+    Batch frames across cameras into shared `predict` calls.
+
+    Each round starts one camera further along than the last (round-robin),
+    so with more due cameras than `batch_size` none is starved. Frames of
+    cameras with a region mask are cropped to it before batching.
+    `on_result(camera, frame, result, counts)` is called for every inferred
+    frame; by default the newest result is kept on `camera.latest`. With an
+    `EventStore`, the counts of every inferred frame are added to the event
+    history, and violations once per worker episode when the episode ends
+    (as for videos), not once per frame. A batch that fails is logged,
+    counted in `errors` (the last message in `last_error`) and skipped.
+    """
+
+    def __init__(self, cameras, batch_size=8, model=None, on_result=None, idle_wait=0.005, events=None):
+        self.cameras = list(cameras)
+        self.batch_size = batch_size
+        self.model = model
+        self.on_result = on_result
+        self.events = events
+        self.idle_wait = idle_wait
+        self.batches = 0
+        self.errors = 0
+        self.last_error = None
+        self._offset = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self.run, name="camera-scheduler", daemon=True)
+
+    def start(self):
+        for camera in self.cameras:
+            camera.start()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        for camera in self.cameras:
+            camera.stop()
+
+    def next_batch(self):
+        """Pick up to `batch_size` due cameras, round-robin, with their newest frames."""
+        now = time.monotonic()
+        count = len(self.cameras)
+        batch = []
+        for step in range(count):
+            camera = self.cameras[(self._offset + step) % count]
+            if not camera.due(now):
+                continue
+            item = camera.take_latest()
+            if item is None:
+                continue
+            camera.last_scheduled = now
+            batch.append((camera, item[0], item[1]))
+            if len(batch) == self.batch_size:
+                break
+        self._offset = (self._offset + 1) % max(count, 1)
+        return batch
+
+    def run(self):
+        try:
+            self._run()
+        finally:
+            if self.events is not None:
+                for camera in self.cameras:
+                    camera.tracker.finish()
+                    self._record_episodes(camera)
+
+    def _record(self, camera, result, counts, captured):
+        ts = time.time() - (time.monotonic() - captured)
+        if camera.origin is None:
+            camera.origin = ts
+        self.events.record_counts(camera.name, counts, ts)
+        camera.tracker.update(int(round((ts - camera.origin) * camera.tick_rate)), result)
+        self._record_episodes(camera)
+
+    def _record_episodes(self, camera):
+        if camera.tracker.events:
+            self.events.record_episodes(camera.name, camera.tracker.events, camera.origin)
+            camera.tracker.events.clear()
+
+    def _run(self):
+        model = self.model or get_model()
+        while not self._stopped.is_set():
+            batch = self.next_batch()
+            if not batch:
+                if all(camera.finished for camera in self.cameras):
+                    return
+                time.sleep(self.idle_wait)
+                continue
+            try:
+                self._infer(model, batch)
+            except Exception as exc:
+                logger.exception("Inference failed for cameras %s", [camera.name for camera, _, _ in batch])
+                self.errors += 1
+                self.last_error = f"{type(exc).__name__}: {exc}"
+
+    def _infer(self, model, batch):
+        crops = [camera.region.crop(frame) if camera.region else (frame, None)
+                 for camera, frame, _ in batch]
+        results = model.predict(source=[crop for crop, _ in crops], show=False,
+                                save=False, verbose=False)
+        self.batches += 1
+        done = time.monotonic()
+        for (camera, frame, captured), (_, origin), result in zip(batch, crops, results):
+            if camera.region is not None:
+                result = camera.region.restore(result, frame, origin)
+            counts = count_classes(result)
+            camera.inferred += 1
+            camera.latency_total += done - captured
+            camera.latest = (frame, result, counts)
+            if self.events is not None:
+                self._record(camera, result, counts, captured)
+            if self.on_result is not None:
+                self.on_result(camera, frame, result, counts)
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def stats(self):
+        return {"batches": self.batches, "errors": self.errors, "last_error": self.last_error,
+                "cameras": [camera.stats() for camera in self.cameras]}
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def start_monitor(sources, target_fps=5.0, batch_size=8, regions=None):
+    """
+    Start (or restart) the process-wide monitor used by the Live Cameras
+    page. `regions` maps a source to its `RegionMask`.
+    """
+    global _monitor
+    regions = regions or {}
+    with _monitor_lock:
+        if _monitor is not None:
+            _monitor.stop()
+        cameras = [CameraStream(source, target_fps=target_fps, loop=True, region=regions.get(source))
+                   for source in sources]
+        _monitor = InferenceScheduler(cameras, batch_size=batch_size, events=get_events()).start()
+        return _monitor
+
+
+def stop_monitor():
+    global _monitor
+    with _monitor_lock:
+        if _monitor is not None:
+            _monitor.stop()
+            _monitor = None
+
+
+def get_monitor():
+    """The running monitor, or None."""
+    return _monitor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m visionarmor.cameras",
+                                     description="Run live PPE detection over several cameras.")
+    parser.add_argument("sources", nargs="+", help="RTSP/HTTP URLs or local video files")
+    parser.add_argument("--fps", type=float, default=5.0, help="target inference FPS per camera")
+    parser.add_argument("--batch-size", type=int, default=8, help="maximum frames per predict call")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    parser.add_argument("--loop", action="store_true", help="replay file sources when they end")
+    parser.add_argument("--regions", help="JSON file mapping sources to region masks")
+    parser.add_argument("--record", action="store_true", help="add every inferred frame to the event history")
+    args = parser.parse_args(argv)
+
+    regions = load_regions(args.regions) if args.regions else {}
+    cameras = [CameraStream(source, target_fps=args.fps, loop=args.loop, region=regions.get(source))
+               for source in args.sources]
+    scheduler = InferenceScheduler(cameras, batch_size=args.batch_size,
+                                   events=get_events() if args.record else None)
+    start = time.monotonic()
+    scheduler.start()
+    try:
+        scheduler.join(args.duration)
+    except KeyboardInterrupt:
+        pass
+    scheduler.stop()
+    elapsed = time.monotonic() - start
+    scheduler.join()
+    for camera in cameras:
+        camera.join()
+    if scheduler.events is not None:
+        scheduler.events.flush()
+    stats = scheduler.stats()
+    stats["seconds"] = round(elapsed, 3)
+    for camera in stats["cameras"]:
+        camera["fps"] = round(camera["inferred"] / elapsed, 2) if elapsed else None
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
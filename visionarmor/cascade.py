@@ -0,0 +1,152 @@
+"""
+Confidence-based model cascade.
+
+Most frames are either clearly compliant or empty, so a `Cascade` screens
+every image with a cheap model first (a nano variant, or the same weights at
+a lower input size) and only sends a frame to the full model when the
+screen is unsure: a person or PPE box with confidence inside `band`, or any
+possible violation. For escalated frames the full model's boxes are merged
+with the screen's confident ones.
+
+A `Cascade` behaves like a YOLO model (`predict` returns `Results`, `names`
+is the class map), so it can be passed wherever a model is; videos are
+fed to it frame by frame rather than as a file stream. It counts how
+many frames it escalated and, on every `audit_every`-th frame it did not
+escalate, also runs the full model to estimate what screening costs in
+accuracy: the mean per-frame count difference and how often both agree on
+whether a frame has a violation.
+
+Configured with environment variables:
+  - `VISIONARMOR_SCREEN_WEIGHTS`: screening weights (default: the main weights).
+  - `VISIONARMOR_SCREEN_IMGSZ`: screening input size (default 320).
+  - `VISIONARMOR_CASCADE_BAND`: confidence band that escalates, "low,high" (default "0.25,0.6").
+"""
+import os
+import threading
+
+import numpy as np
+
+from visionarmor.cache import file_hash
+from visionarmor.counting import TARGET_INDEX, VIOLATION_INDICES, class_index_map, result_counts
+from visionarmor.models import DEFAULT_WEIGHTS, get_model
+from visionarmor.results import boxes_result
+from visionarmor.tiling import nms
+
+SCREEN_WEIGHTS = os.environ.get("VISIONARMOR_SCREEN_WEIGHTS", DEFAULT_WEIGHTS)
+SCREEN_IMGSZ = int(os.environ.get("VISIONARMOR_SCREEN_IMGSZ", "320"))
+BAND = tuple(float(value) for value in os.environ.get("VISIONARMOR_CASCADE_BAND", "0.25,0.6").split(","))
+AUDIT_EVERY = 20
+
+# Classes whose uncertain boxes escalate a frame (people and their PPE, not cones or machinery)
+SCREENED_INDICES = np.array([TARGET_INDEX[cls] for cls in
+                             ('hardhat', 'mask', 'no-hardhat', 'no-mask', 'no-safety vest', 'person', 'safety vest')])
+
+
+class Cascade:
+    """
+    Screen with `screen` at `screen_imgsz`, escalate uncertain frames to `full`.
+
+    A frame is escalated when a screened class has a box with confidence in
+    `[band[0], band[1])`, or when `escalate_violations` is set and a "no-"
+    box reaches `band[0]`. One instance keeps running statistics, so use
+    one per request to report them per request.
+    """
+
+    frame_by_frame = True  # escalation needs each frame, so no YOLO file streams
+
+    def __init__(self, full=None, screen=None, screen_imgsz=SCREEN_IMGSZ, band=BAND,
+                 escalate_violations=True, audit_every=AUDIT_EVERY, merge_threshold=0.5):
+        self.full = full or get_model()
+        self.screen = screen or get_model(SCREEN_WEIGHTS)
+        self.screen_imgsz = screen_imgsz
+        self.band = band
+        self.escalate_violations = escalate_violations
+        self.audit_every = audit_every
+        self.merge_threshold = merge_threshold
+        self.names = self.full.names
+        self.frames = 0
+        self.escalated = 0
+        self.audited = 0
+        self.count_error = 0
+        self.verdict_agreed = 0
+        self._lock = threading.Lock()
+
+    def params(self):
+        """Settings that change the output, for cache keys (the screening weights by content)."""
+        # A hub name such as "yolov8n.pt" that was never downloaded here has no local file
+        weights = file_hash(SCREEN_WEIGHTS, memoize=True) if os.path.isfile(SCREEN_WEIGHTS) else SCREEN_WEIGHTS
+        return {"screen_weights": weights, "screen_imgsz": self.screen_imgsz,
+                "band": list(self.band), "escalate_violations": self.escalate_violations}
+
+    def should_escalate(self, result):
+        """Whether the screening `result` is unsure enough to need the full model."""
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return False
+        cls = class_index_map(result.names)[boxes.cls.cpu().numpy().astype(np.intp)]
+        conf = boxes.conf.cpu().numpy()
+        low, high = self.band
+        uncertain = np.isin(cls, SCREENED_INDICES) & (conf >= low) & (conf < high)
+        if uncertain.any():
+            return True
+        return self.escalate_violations and bool((np.isin(cls, VIOLATION_INDICES) & (conf >= low)).any())
+
+    def _merge(self, screened, full):
+        """The full model's boxes plus the screen's confident ones, de-duplicated."""
+        data = [full.boxes.data.cpu().numpy()] if full.boxes is not None and len(full.boxes) else []
+        if screened.boxes is not None and len(screened.boxes):
+            boxes = screened.boxes.data.cpu().numpy()
+            data.append(boxes[boxes[:, 4] >= self.band[1]])
+        data = np.concatenate(data) if data else np.zeros((0, 6), dtype=np.float32)
+        if len(data):
+            data = data[nms(data[:, :4], data[:, 4], data[:, 5], self.merge_threshold)]
+        return boxes_result(full.orig_img, full.path, full.names, data)
+
+    def _audit(self, screened, full):
+        screen_counts, full_counts = result_counts(screened), result_counts(full)
+        with self._lock:
+            self.audited += 1
+            self.count_error += int(np.abs(screen_counts - full_counts).sum())
+            self.verdict_agreed += (bool(screen_counts[VIOLATION_INDICES].any())
+                                    == bool(full_counts[VIOLATION_INDICES].any()))
+
+    def _resolve(self, screened, conf, full_kwargs):
+        with self._lock:
+            self.frames += 1
+            frame = self.frames
+        if self.should_escalate(screened):
+            with self._lock:
+                self.escalated += 1
+            full = self.full.predict(source=screened.orig_img, **full_kwargs)[0]
+            return self._merge(screened, full)
+        screened = self._keep_confident(screened, conf)
+        if self.audit_every and frame % self.audit_every == 0:
+            self._audit(screened, self.full.predict(source=screened.orig_img, **full_kwargs)[0])
+        return screened
+
+    def predict(self, source=None, stream=False, **kwargs):
+        """Like `YOLO.predict`: a list of `Results`, or a generator with `stream=True`."""
+        kwargs.setdefault("verbose", False)
+        full_kwargs = {key: value for key, value in kwargs.items() if key not in ("show", "save")}
+        screen_kwargs = {**kwargs, "imgsz": self.screen_imgsz,
+                         "conf": min(kwargs.get("conf", self.band[0]), self.band[0])}
+        screened = self.screen.predict(source=source, stream=stream, **screen_kwargs)
+        results = (self._resolve(result, kwargs.get("conf", 0.25), full_kwargs) for result in screened)
+        return results if stream else list(results)
+
+    @staticmethod
+    def _keep_confident(result, conf):
+        if result.boxes is None or len(result.boxes) == 0:
+            return result
+        keep = result.boxes.conf.cpu().numpy() >= conf
+        return result if keep.all() else result[np.flatnonzero(keep).tolist()]
+
+    def stats(self):
+        """Escalation rate and, from the audited frames, the accuracy given up by screening."""
+        with self._lock:
+            return {"frames": self.frames, "escalated": self.escalated,
+                    "escalation_rate": self.escalated / self.frames if self.frames else None,
+                    "audited": self.audited,
+                    "count_delta": self.count_error / self.audited if self.audited else None,
+                    "verdict_agreement": self.verdict_agreed / self.audited if self.audited else None}
+
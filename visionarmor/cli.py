@@ -0,0 +1,179 @@
+"""
+Command-line PPE audit.
+
+Walks files, directories or glob patterns of images and videos, processes
+them on a worker pool and writes one record per file (detection counts and
+violation alerts) as JSON Lines or CSV:
+
+    python -m visionarmor dataset/test/images -o audit.jsonl
+    python -m visionarmor "archive/**/*.jpg" --format csv -o audit.csv --workers 4
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from visionarmor.events import get_events
+from visionarmor.regions import RegionMask
+from visionarmor.results import IMAGE_EXTENSIONS, TARGET_CLASSES, VIDEO_EXTENSIONS, video_fps, violation_alerts
+
+
+def collect_inputs(patterns):
+    """Expand files, directories (recursively) and glob patterns into a sorted file list."""
+    found = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for dirpath, _, filenames in os.walk(pattern):
+                found.update(os.path.join(dirpath, name) for name in filenames)
+        elif os.path.isfile(pattern):
+            found.add(pattern)
+        else:
+            found.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(path for path in found if path.lower().endswith(IMAGE_EXTENSIONS + VIDEO_EXTENSIONS))
+
+
+def audit_file(path, sampler_args=None, conf_threshold=None, tiler_args=None, region=None, cascade=False):
+    """
+    Process one image or video and return a record with:
+      - 'file', 'type' ('image' or 'video'), 'frames'
+      - 'violation_frames': frames with a "no-" detection (videos only)
+      - 'detection_info': per-class counts (summed over frames for videos)
+      - 'alerts': violation messages (one per worker episode for videos)
+      - 'events': violation episodes with timestamps (videos only)
+      - 'timings': seconds per processing stage (videos only)
+      - 'cascade': escalation statistics (with `cascade`, JSON Lines only)
+      - 'output': annotated output path
+      - 'error': set instead of the above when processing failed
+    """
+    from visionarmor.cascade import Cascade
+    from visionarmor.detection import process_image, process_video
+    from visionarmor.sampling import FrameSampler
+    from visionarmor.tiling import Tiler
+
+    record = {"file": path}
+    model = Cascade() if cascade else None
+    try:
+        if path.lower().endswith(VIDEO_EXTENSIONS):
+            sampler = None
+            if sampler_args and sampler_args.get("target_fps"):
+                sampler = FrameSampler.for_target_fps(video_fps(path), sampler_args["target_fps"],
+                                                      motion_threshold=sampler_args["motion_threshold"])
+            elif sampler_args:
+                sampler = FrameSampler(stride=sampler_args["stride"],
+                                       motion_threshold=sampler_args["motion_threshold"])
+            processed = process_video(path, sampler=sampler, conf_threshold=conf_threshold, region=region,
+                                      cascade=model)
+            if processed is None:
+                raise ValueError("no frames could be read")
+            record.update(type="video", frames=processed["frames"], output=processed["video"],
+                          violation_frames=processed["violation_frames"],
+                          detection_info=processed["counts"], events=processed["events"],
+                          timings=processed["timings"])
+            record["alerts"] = violation_alerts(processed["violations"])
+            if cascade:
+                record["cascade"] = processed["cascade"]
+        else:
+            tiler = Tiler(**tiler_args) if tiler_args else None
+            output, detection_info = process_image(path, conf_threshold, tiler=tiler, region=region,
+                                                  cascade=model)
+            if output is None:
+                raise ValueError("image could not be processed")
+            record.update(type="image", frames=1, output=output, detection_info=detection_info)
+            record["alerts"] = violation_alerts(detection_info)
+            if cascade:
+                record["cascade"] = model.stats()
+    except Exception as exc:
+        record["error"] = str(exc)
+    return record
+
+
+def write_jsonl(records, out):
+    for record in records:
+        out.write(json.dumps(record) + "\n")
+        out.flush()
+
+
+def write_csv(records, out):
+    fieldnames = (["file", "type", "frames", "violation_frames"] + TARGET_CLASSES
+                  + ["alerts", "output", "error"])
+    writer = csv.DictWriter(out, fieldnames=fieldnames)
+    writer.writeheader()
+    for record in records:
+        row = {key: record.get(key, "") for key in ("file", "type", "frames", "violation_frames", "output", "error")}
+        row.update(record.get("detection_info", {}))
+        row["alerts"] = "; ".join(record.get("alerts", []))
+        writer.writerow(row)
+        out.flush()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m visionarmor",
+                                     description="Audit images and videos for missing PPE.")
+    parser.add_argument("inputs", nargs="+", help="files, directories or glob patterns")
+    parser.add_argument("-o", "--output", help="output file (default: standard output)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="output format (default: from the file extension, else jsonl)")
+    parser.add_argument("--workers", type=int, default=2, help="files processed in parallel (default: 2)")
+    parser.add_argument("--stride", type=int, default=1, help="run detection on every Nth video frame")
+    parser.add_argument("--target-fps", type=float,
+                        help="run detection at about this many frames per second (overrides --stride)")
+    parser.add_argument("--motion-threshold", type=float,
+                        help="skip video frames with less than this fraction of pixels changed")
+    parser.add_argument("--conf-threshold", type=float,
+                        help="ignore detections below this confidence when counting")
+    parser.add_argument("--tile-size", type=int,
+                        help="predict large images in overlapping tiles of this many pixels")
+    parser.add_argument("--tile-overlap", type=float, default=0.2,
+                        help="overlap between tiles as a fraction of the tile size (default: 0.2)")
+    parser.add_argument("--region", help="JSON file with include/exclude polygons applied to every file")
+    parser.add_argument("--cascade", action="store_true",
+                        help="screen with a fast model and run the full model only on uncertain frames")
+    parser.add_argument("--fail-on-violation", action="store_true",
+                        help="exit with status 1 if any file has missing PPE")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    paths = collect_inputs(args.inputs)
+    if not paths:
+        print("No images or videos found.", file=sys.stderr)
+        return 2
+
+    fmt = args.format or ("csv" if args.output and args.output.lower().endswith(".csv") else "jsonl")
+    sampler_args = None
+    if args.stride > 1 or args.target_fps or args.motion_threshold is not None:
+        sampler_args = {"stride": args.stride, "target_fps": args.target_fps,
+                        "motion_threshold": args.motion_threshold}
+    region = None
+    if args.region:
+        with open(args.region) as f:
+            region = RegionMask.from_json(f.read())
+    tiler_args = None
+    if args.tile_size:
+        tiler_args = {"tile_size": args.tile_size, "overlap": args.tile_overlap}
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    violations = errors = 0
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            records = pool.map(lambda path: audit_file(path, sampler_args, args.conf_threshold, tiler_args, region,
+                                                             args.cascade), paths)
+
+            def tally(records):
+                nonlocal violations, errors
+                for record in records:
+                    violations += bool(record.get("alerts"))
+                    errors += "error" in record
+                    yield record
+
+            (write_csv if fmt == "csv" else write_jsonl)(tally(records), out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        get_events().flush()
+
+    print(f"Audited {len(paths)} file(s): {violations} with missing PPE, {errors} failed.", file=sys.stderr)
+    return 1 if args.fail_on_violation and violations else 0
@@ -0,0 +1,104 @@
+"""
+Vectorized detection counting.
+
+Model class ids are mapped to positions in `TARGET_CLASSES` through a
+lookup table built once per model, so a frame's boxes are counted with a
+single `np.bincount` instead of a Python loop over boxes. Videos keep one
+count vector per frame in a `CountSeries`.
+"""
+import functools
+
+import numpy as np
+
+# Target classes from the dataset (all in lowercase)
+TARGET_CLASSES = ['hardhat', 'mask', 'no-hardhat', 'no-mask', 'no-safety vest',
+                  'person', 'safety cone', 'safety vest', 'machinery', 'vehicle']
+
+# "no-" classes that indicate missing PPE, with the item they refer to
+VIOLATION_CLASSES = {'no-hardhat': 'a hardhat', 'no-mask': 'a mask', 'no-safety vest': 'a safety vest'}
+
+TARGET_INDEX = {cls: i for i, cls in enumerate(TARGET_CLASSES)}
+VIOLATION_INDICES = np.array([TARGET_INDEX[cls] for cls in VIOLATION_CLASSES])
+
+
+@functools.lru_cache(maxsize=8)
+def _index_map(names):
+    lut = np.full(max(i for i, _ in names) + 1, -1, dtype=np.intp)
+    for i, name in names:
+        lut[i] = TARGET_INDEX.get(name.lower(), -1)
+    return lut
+
+
+def class_index_map(names):
+    """
+    Lookup table from model class id to `TARGET_CLASSES` position (-1 for
+    classes that are not counted). `names` is the model's id -> name mapping.
+    """
+    if not isinstance(names, dict):
+        names = dict(enumerate(names))
+    return _index_map(tuple(sorted(names.items())))
+
+
+def count_vector(cls_ids, names, conf=None, conf_threshold=None):
+    """
+    Count detections per target class.
+
+    `cls_ids` and `conf` are per-box arrays; boxes below `conf_threshold`
+    are ignored. Returns an int array aligned with `TARGET_CLASSES`.
+    """
+    cls_ids = np.asarray(cls_ids).astype(np.intp, copy=False)
+    mapped = class_index_map(names)[cls_ids]
+    keep = mapped >= 0
+    if conf_threshold is not None and conf is not None:
+        keep &= np.asarray(conf) >= conf_threshold
+    return np.bincount(mapped[keep], minlength=len(TARGET_CLASSES))
+
+
+def result_counts(result, conf_threshold=None):
+    """`count_vector` for a YOLO `Results` object (zeros when it has no boxes)."""
+    if result is None or result.boxes is None or result.boxes.cls is None:
+        return np.zeros(len(TARGET_CLASSES), dtype=np.intp)
+    boxes = result.boxes
+    conf = boxes.conf.cpu().numpy() if conf_threshold is not None else None
+    return count_vector(boxes.cls.cpu().numpy(), result.names, conf, conf_threshold)
+
+
+def counts_to_dict(counts):
+    """Turn a count vector into the `detection_info` dictionary used by the app."""
+    return dict(zip(TARGET_CLASSES, np.asarray(counts).tolist()))
+
+
+class CountSeries:
+    """
+    Per-frame count vectors for a video, stored in one growing int32 array
+    (one row per frame, one column per target class).
+    """
+
+    def __init__(self, capacity=1024):
+        self._data = np.zeros((capacity, len(TARGET_CLASSES)), dtype=np.int32)
+        self._length = 0
+
+    def append(self, counts):
+        if self._length == len(self._data):
+            self._data = np.concatenate([self._data, np.zeros_like(self._data)])
+        self._data[self._length] = counts
+        self._length += 1
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def array(self):
+        """View of the recorded rows (frames x classes)."""
+        return self._data[:self._length]
+
+    def totals(self):
+        """Per-class detections summed over all frames."""
+        return self.array.sum(axis=0)
+
+    def violation_frames(self):
+        """Number of frames with at least one "no-" detection."""
+        return int(np.count_nonzero(self.array[:, VIOLATION_INDICES].any(axis=1)))
+
+    def save(self, path):
+        np.save(path, self.array)
@@ -0,0 +1,260 @@
+"""
+Precomputed index over the bundled dataset labels.
+
+`dataset/{train,valid,test}/labels` holds thousands of one-line-per-box YOLO
+`.txt` files. `build_index` packs them once into a few NumPy arrays under
+`runs/index`, loaded memory-mapped by `LabelIndex`:
+  - per box: image id, class, normalized `xyxy`,
+  - per image: split, first box and box count, width, height and a
+    per-class count row (images x classes), plus the image paths,
+
+so class distributions and "which images contain ..." queries are array
+operations instead of a scan over thousands of files:
+
+    index = LabelIndex.open_or_build()
+    index.find(min_counts={"no-hardhat": 1, "person": 6})
+
+`letterboxed` caches decoded images resized and padded to the model input
+size in one memory-mapped array, so repeated evaluation runs skip JPEG
+decoding and resizing. Rebuilding the index deletes these caches.
+
+    python -m visionarmor.dataset build
+    python -m visionarmor.dataset stats --split test
+    python -m visionarmor.dataset find --min no-hardhat=1 --min person=6
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from visionarmor.counting import TARGET_CLASSES, TARGET_INDEX
+from visionarmor.results import IMAGE_EXTENSIONS
+
+DATASET_ROOT = "dataset"
+INDEX_ROOT = "runs/index"
+SPLITS = ("train", "valid", "test")
+PAD_VALUE = 114
+COLUMNS = ("box_image", "box_class", "box_xyxy", "image_split", "image_start", "image_boxes",
+           "image_size", "image_counts")
+
+
+def _source_state(root):
+    """Modification times of the split directories, to tell when an index is stale."""
+    state = {}
+    for split in SPLITS:
+        for sub in ("images", "labels"):
+            path = os.path.join(root, split, sub)
+            if os.path.isdir(path):
+                state[f"{split}/{sub}"] = os.path.getmtime(path)
+    return state
+
+
+def _read_labels(path):
+    try:
+        with open(path) as f:
+            rows = [line.split()[:5] for line in f if line.strip()]
+    except OSError:
+        return np.zeros((0, 5), dtype=np.float32)
+    return np.array(rows, dtype=np.float32).reshape(-1, 5)
+
+
+def build_index(root=DATASET_ROOT, out=INDEX_ROOT):
+    """Scan every split of `root` once and write the index to `out`; returns the opened index."""
+    from PIL import Image
+
+    paths, splits, sizes, labels = [], [], [], []
+    for split_id, split in enumerate(SPLITS):
+        image_dir = os.path.join(root, split, "images")
+        if not os.path.isdir(image_dir):
+            continue
+        for name in sorted(os.listdir(image_dir)):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            image_path = os.path.join(image_dir, name)
+            with Image.open(image_path) as image:  # reads the header only
+                sizes.append(image.size)
+            paths.append(os.path.relpath(image_path, root))
+            splits.append(split_id)
+            labels.append(_read_labels(os.path.join(root, split, "labels", os.path.splitext(name)[0] + ".txt")))
+
+    box_counts = np.array([len(rows) for rows in labels], dtype=np.int32)
+    rows = np.concatenate(labels) if labels else np.zeros((0, 5), dtype=np.float32)
+    xc, yc, w, h = rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4]
+    box_image = np.repeat(np.arange(len(paths), dtype=np.int32), box_counts)
+    box_class = rows[:, 0].astype(np.int16)
+    counts = np.zeros((len(paths), len(TARGET_CLASSES)), dtype=np.int32)
+    valid = (box_class >= 0) & (box_class < len(TARGET_CLASSES))
+    np.add.at(counts, (box_image[valid], box_class[valid]), 1)
+    arrays = {"box_image": box_image, "box_class": box_class,
+              "box_xyxy": np.stack([xc - w / 2, yc - h / 2, xc + w / 2, yc + h / 2], axis=1).astype(np.float32),
+              "image_split": np.array(splits, dtype=np.int8),
+              "image_start": (np.cumsum(box_counts, dtype=np.int64) - box_counts),
+              "image_boxes": box_counts,
+              "image_size": np.array(sizes, dtype=np.int32).reshape(-1, 2),
+              "image_counts": counts}
+
+    os.makedirs(out, exist_ok=True)
+    # Letterbox caches are rows in the old image order; drop them with the old index
+    for name in os.listdir(out):
+        if name.startswith("letterbox-"):
+            os.remove(os.path.join(out, name))
+    for name, array in arrays.items():
+        np.save(os.path.join(out, f"{name}.npy"), array)
+    with open(os.path.join(out, "meta.json"), "w") as f:
+        json.dump({"root": os.path.abspath(root), "source": _source_state(root),
+                   "classes": TARGET_CLASSES, "paths": paths}, f)
+    return LabelIndex(out)
+
+
+class LabelIndex:
+    """Memory-mapped view of an index written by `build_index`."""
+
+    def __init__(self, path=INDEX_ROOT):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        for name in COLUMNS:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+        self.paths = [os.path.join(self.meta["root"], path) for path in self.meta["paths"]]
+        self._ids = {os.path.abspath(path): i for i, path in enumerate(self.paths)}
+
+    @classmethod
+    def open_or_build(cls, root=DATASET_ROOT, path=INDEX_ROOT):
+        """Open the index at `path`, (re)building it first if missing or older than the dataset."""
+        try:
+            index = cls(path)
+        except (OSError, ValueError):
+            return build_index(root, path)
+        if index.meta["source"] != _source_state(root) or index.meta["classes"] != TARGET_CLASSES:
+            return build_index(root, path)
+        return index
+
+    def __len__(self):
+        return len(self.paths)
+
+    def _split_mask(self, split):
+        if split is None:
+            return np.ones(len(self), dtype=bool)
+        return np.asarray(self.image_split) == SPLITS.index(split)
+
+    def image_ids(self, split=None):
+        return np.flatnonzero(self._split_mask(split))
+
+    def image_id(self, image_path):
+        """Id of `image_path`, or None if it is not in the index."""
+        return self._ids.get(os.path.abspath(image_path))
+
+    def labels(self, image_id):
+        """Ground truth of one image as `(classes, xyxy)` with normalized coordinates."""
+        start, count = int(self.image_start[image_id]), int(self.image_boxes[image_id])
+        return (np.asarray(self.box_class[start:start + count], dtype=np.intp),
+                np.asarray(self.box_xyxy[start:start + count], dtype=np.float64))
+
+    def class_distribution(self, split=None):
+        """Per class: number of boxes and number of images with at least one."""
+        counts = np.asarray(self.image_counts)[self._split_mask(split)]
+        boxes, images = counts.sum(axis=0), np.count_nonzero(counts, axis=0)
+        return {cls: {"boxes": int(boxes[i]), "images": int(images[i])} for i, cls in enumerate(TARGET_CLASSES)}
+
+    def find(self, min_counts=None, max_counts=None, split=None):
+        """
+        Image ids whose per-class box counts are at least `min_counts` and at
+        most `max_counts` (dictionaries keyed by class name), e.g.
+        `find({"no-hardhat": 1, "person": 6})` for images with a missing
+        hardhat and more than five people.
+        """
+        counts = np.asarray(self.image_counts)
+        mask = self._split_mask(split)
+        for cls, value in (min_counts or {}).items():
+            mask &= counts[:, TARGET_INDEX[cls.lower()]] >= value
+        for cls, value in (max_counts or {}).items():
+            mask &= counts[:, TARGET_INDEX[cls.lower()]] <= value
+        return np.flatnonzero(mask)
+
+    def letterboxed(self, split, imgsz=640):
+        """
+        Images of `split` letterboxed to `imgsz` (BGR, uint8, one row per
+        image in `image_ids(split)` order) and their `(scale, pad_x, pad_y)`,
+        both memory-mapped from a cache built on first use.
+        """
+        ids = self.image_ids(split)
+        images_path = os.path.join(self.path, f"letterbox-{split}-{imgsz}.npy")
+        params_path = os.path.join(self.path, f"letterbox-{split}-{imgsz}-params.npy")
+        if not (os.path.exists(images_path) and os.path.exists(params_path)):
+            import cv2
+
+            tmp = images_path + ".tmp"
+            images = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.uint8, shape=(len(ids), imgsz, imgsz, 3))
+            params = np.zeros((len(ids), 3), dtype=np.float32)
+            for row, image_id in enumerate(ids):
+                params[row] = letterbox(cv2.imread(self.paths[image_id]), imgsz, out=images[row])
+            images.flush()
+            del images
+            np.save(params_path, params)
+            os.replace(tmp, images_path)
+        return np.load(images_path, mmap_mode="r"), np.load(params_path, mmap_mode="r")
+
+
+def letterbox(image, imgsz, out=None):
+    """
+    Resize `image` to fit `imgsz` x `imgsz` keeping its aspect ratio and pad
+    the rest with grey, as the model's own preprocessing does. Writes into
+    `out` when given and returns `(scale, pad_x, pad_y)`.
+    """
+    import cv2
+
+    height, width = image.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    new_w, new_h = round(width * scale), round(height * scale)
+    pad_x, pad_y = (imgsz - new_w) // 2, (imgsz - new_h) // 2
+    if out is None:
+        out = np.empty((imgsz, imgsz, 3), dtype=np.uint8)
+    out[...] = PAD_VALUE
+    out[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return scale, pad_x, pad_y
+
+
+def _count_condition(text):
+    cls, _, value = text.rpartition("=")
+    if cls.lower() not in TARGET_INDEX:
+        raise argparse.ArgumentTypeError(f"unknown class {cls!r}")
+    return cls.lower(), int(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m visionarmor.dataset",
+                                     description="Build and query the dataset label index.")
+    parser.add_argument("--root", default=DATASET_ROOT)
+    parser.add_argument("--index", default=INDEX_ROOT)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="(re)build the index")
+    stats = commands.add_parser("stats", help="per-class box and image counts")
+    stats.add_argument("--split", choices=SPLITS)
+    find = commands.add_parser("find", help="list images by per-class counts")
+    find.add_argument("--split", choices=SPLITS)
+    find.add_argument("--min", type=_count_condition, action="append", default=[], metavar="CLASS=N")
+    find.add_argument("--max", type=_count_condition, action="append", default=[], metavar="CLASS=N")
+    cache = commands.add_parser("cache", help="build the letterboxed image cache of a split")
+    cache.add_argument("--split", choices=SPLITS, default="test")
+    cache.add_argument("--imgsz", type=int, default=640)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        index = build_index(args.root, args.index)
+        print(f"Indexed {len(index)} images and {len(index.box_class)} boxes into {args.index}")
+        return 0
+    index = LabelIndex.open_or_build(args.root, args.index)
+    if args.command == "stats":
+        print(json.dumps(index.class_distribution(args.split), indent=2))
+    elif args.command == "find":
+        for image_id in index.find(dict(args.min), dict(args.max), args.split):
+            print(index.paths[image_id])
+    elif args.command == "cache":
+        images, _ = index.letterboxed(args.split, args.imgsz)
+        print(f"Cached {len(images)} letterboxed {args.split} images at {args.imgsz}px")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
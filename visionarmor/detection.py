@@ -0,0 +1,202 @@
+"""
+Detection entry points shared by the Streamlit app and the command-line tool.
+
+Nothing here depends on Streamlit, so images and videos can be processed
+from scripts, cron jobs or other services:
+
+    from visionarmor.detection import process_image, process_video
+"""
+import contextlib
+import os
+import time
+
+import cv2
+import numpy as np
+
+from visionarmor import metrics
+from visionarmor.cache import cache_key, file_hash, get_cache
+from visionarmor.events import get_events
+from visionarmor.models import DEFAULT_BACKEND, DEFAULT_WEIGHTS, get_model
+from visionarmor.results import VIOLATION_CLASSES, count_classes, new_output_dir, save_annotated_image, video_fps
+from visionarmor.streaming import stream_video
+from visionarmor.tracking import ViolationTracker, episode_counts
+
+
+def _video_lookup(video_path, sampler, conf_threshold, region, cascade, content_hash):
+    """Return `(key, result)`: the cache key of a video request and its cached result, or None."""
+    params = {"mode": "video",
+              "stride": sampler.stride if sampler else 1,
+              "motion_threshold": sampler.motion_threshold if sampler else None,
+              "conf_threshold": conf_threshold, "tracking": 1, "backend": DEFAULT_BACKEND}
+    if region is not None:
+        params["region"] = region.params()
+    if cascade is not None:
+        params["cascade"] = cascade.params()
+    with metrics.timed("hash", mode="video"):
+        key = cache_key(content_hash or file_hash(video_path), file_hash(DEFAULT_WEIGHTS, memoize=True), params)
+    with metrics.timed("cache", mode="video"):
+        hit = get_cache().get(key)
+    if hit is None:
+        return key, None
+    metrics.inc("visionarmor_requests_total", mode="video", cache="hit")
+    return key, {"video": os.path.join(hit["dir"], hit["video"]),
+                 "images": [os.path.join(hit["dir"], name) for name in hit["images"]],
+                 "counts": hit["counts"], "frames": hit["frames"],
+                 "inferred_frames": hit["inferred_frames"],
+                 "violation_frames": hit["violation_frames"],
+                 "timeline": os.path.join(hit["dir"], hit["timeline"]),
+                 "events": hit["events"], "violations": hit["violations"],
+                 "timings": hit["timings"], "cascade": hit.get("cascade")}
+
+
+def cached_video(video_path, sampler=None, conf_threshold=None, region=None, cascade=None, content_hash=None):
+    """
+    The result `process_video` would return for these settings if it is
+    already cached, else None; nothing is processed. Pass `content_hash`
+    (from `file_hash`) when the clip has been hashed already.
+    """
+    return _video_lookup(video_path, sampler, conf_threshold, region, cascade, content_hash)[1]
+
+
+def process_video(video_path, on_frame=None, sampler=None, conf_threshold=None, pipelined=True,
+                  region=None, source=None, cascade=None, content_hash=None):
+    """
+    Process a video using YOLOv8 and return a dictionary containing:
+      - 'video': the path to the processed video (annotated frames).
+      - 'images': a list of sample image file paths with detection results.
+      - 'counts': per-class detections summed over all frames.
+      - 'frames': the number of frames processed.
+      - 'inferred_frames': the number of frames the model actually ran on.
+      - 'violation_frames': the number of frames with a "no-" detection.
+      - 'timeline': path of the per-frame class counts (`.npy`, frames x classes).
+      - 'events': one violation event per worker per episode, with
+        'worker', 'class', 'start' / 'end' (seconds) and frame numbers.
+      - 'violations': number of violation episodes per "no-" class.
+      - 'timings': seconds spent in each stage (decode, infer, post, encode).
+      - 'cascade': escalation statistics when run through a `Cascade`, else None.
+
+    Frames are streamed through the model one at a time; `on_frame` (if given)
+    is called with each update from `stream_video` so the page can show
+    progress while the clip is still being processed. An optional
+    `FrameSampler` skips inference on frames between strides or without
+    motion, reusing the previous detections for them. Person boxes are
+    tracked across frames so a worker missing PPE for several seconds is
+    reported once, not once per frame. With `pipelined` (the default),
+    decoding and annotation+encoding run on their own threads so they
+    overlap with inference. With a `RegionMask`, frames are cropped to the
+    watched area and detections outside it are dropped. With a `Cascade`,
+    frames are screened by a fast model and only uncertain ones escalated.
+
+    Boxes below `conf_threshold` are left out of the counts. Results are
+    cached by file content, weights, sampling and threshold settings, so
+    re-uploading the same clip returns immediately (see `cached_video` to
+    check without processing). `content_hash` skips hashing the clip again.
+
+    Stage timings, detections and violation episodes are recorded in
+    `visionarmor.metrics`; per-frame counts and violation episodes of newly
+    processed clips are added to the event history under `source` (default:
+    the file name).
+    """
+    key, hit = _video_lookup(video_path, sampler, conf_threshold, region, cascade, content_hash)
+    if hit is not None:
+        return hit
+
+    fps = video_fps(video_path)
+    started = time.time()
+    tracker = ViolationTracker(fps, min_gap_frames=2 * (sampler.stride if sampler else 1))
+    update = None
+    # Closed right away if `on_frame` raises (e.g. a cancelled job), which stops the decode and encode threads
+    with contextlib.closing(stream_video(video_path, new_output_dir(), model=cascade, sampler=sampler,
+                                         tracker=tracker, conf_threshold=conf_threshold, pipelined=pipelined,
+                                         region=region)) as updates:
+        for update in updates:
+            if on_frame is not None:
+                on_frame(update)
+    if update is None:
+        return None
+    for stage, seconds in update["timings"].items():
+        metrics.record_stage(stage, seconds, mode="video")
+
+    processed = {"video": update["video"], "images": update["images"],
+                 "counts": update["totals"], "frames": update["index"] + 1,
+                 "inferred_frames": update["inferred_frames"],
+                 "violation_frames": update["violation_frames"], "timeline": update["timeline"],
+                 "events": tracker.events, "violations": episode_counts(tracker.events),
+                 "timings": update["timings"], "cascade": cascade.stats() if cascade is not None else None}
+    with metrics.timed("store", mode="video"):
+        get_cache().put(key, [processed["video"], processed["timeline"]] + processed["images"],
+                  {**processed, "video": os.path.basename(processed["video"]),
+                   "timeline": os.path.basename(processed["timeline"]),
+                   "images": [os.path.basename(path) for path in processed["images"]]})
+    metrics.inc("visionarmor_requests_total", mode="video", cache="miss")
+    metrics.count_detections(processed["counts"], processed["violations"], mode="video")
+    get_events().record_video(source or os.path.basename(video_path), np.load(processed["timeline"]), fps,
+                              processed["events"], ts=started)
+    return processed
+
+
+def process_image(image_path, conf_threshold=None, tiler=None, region=None, source=None, cascade=None):
+    """
+    Process a single image using YOLOv8 and return:
+      - processed_image: the path to the processed image.
+      - detection_info: a dictionary containing counts for each of the 10 classes.
+
+    The annotated image is written to a directory that belongs to this
+    request only. Boxes below `conf_threshold` are left out of the counts.
+    With a `Tiler`, large images are predicted tile by tile so small,
+    distant workers are still detected; with a `RegionMask`, only the
+    watched area is inferred and counted; with a `Cascade`, a fast model
+    screens the image first (see `cascade.stats()` afterwards). Results are
+    cached by file content, weights and threshold, so re-uploading the same
+    image returns immediately. Stage timings and per-class counts are
+    recorded in `visionarmor.metrics`, and the counts of newly processed
+    images in the event history under `source` (default: the file name).
+    """
+    params = {"mode": "image", "conf_threshold": conf_threshold, "backend": DEFAULT_BACKEND}
+    if tiler is not None:
+        params["tiling"] = tiler.params()
+    if region is not None:
+        params["region"] = region.params()
+    if cascade is not None:
+        params["cascade"] = cascade.params()
+    cache = get_cache()
+    with metrics.timed("hash", mode="image"):
+        key = cache_key(file_hash(image_path), file_hash(DEFAULT_WEIGHTS, memoize=True), params)
+    with metrics.timed("cache", mode="image"):
+        hit = cache.get(key)
+    if hit is not None:
+        metrics.inc("visionarmor_requests_total", mode="image", cache="hit")
+        return os.path.join(hit["dir"], hit["image"]), hit["detection_info"]
+
+    model = cascade or get_model()
+    if tiler is not None or region is not None:
+        image = cv2.imread(image_path)
+        if image is None:
+            return None, None
+        with metrics.timed("predict_tiled" if tiler else "predict", mode="image"):
+            if region is not None:
+                results = [region.predict(model, image, predict=tiler.predict if tiler else None)]
+            else:
+                results = [tiler.predict(model, image)]
+    else:
+        with metrics.timed("predict", mode="image"):
+            results = model.predict(source=image_path, show=False, save=False, verbose=False)
+    if not results:
+        return None, None
+    # Ultralytics reports its own split of the predict call, in milliseconds.
+    for stage, ms in (getattr(results[0], "speed", None) or {}).items():
+        if ms is not None:
+            metrics.record_stage(stage, ms / 1000, mode="image")
+
+    with metrics.timed("encode", mode="image"):
+        processed_image_path = save_annotated_image(results[0], new_output_dir())
+    with metrics.timed("post", mode="image"):
+        detection_info = count_classes(results[0], conf_threshold)
+    with metrics.timed("store", mode="image"):
+        cache.put(key, [processed_image_path],
+                  {"image": os.path.basename(processed_image_path), "detection_info": detection_info})
+    metrics.inc("visionarmor_requests_total", mode="image", cache="miss")
+    metrics.count_detections(detection_info, {cls: detection_info.get(cls, 0) for cls in VIOLATION_CLASSES}, mode="image")
+    get_events().record_image(source or os.path.basename(image_path), detection_info)
+
+    return processed_image_path, detection_info
@@ -0,0 +1,251 @@
+"""
+Detection history.
+
+Every processed image, video frame and camera frame is appended to a local
+SQLite database (`runs/events.db`, or `VISIONARMOR_EVENTS_DB`):
+  - `detections`: per-class box counts of one image or frame,
+  - `violations`: violation events (one per worker episode for videos and
+    cameras, one per "no-" box for images),
+  - `rollups`: detections and violations per hour and per day (UTC), by
+    source and class, kept up to date as events are written,
+
+with indexes on time, source and class, so dashboard queries over long
+periods read the rollups instead of scanning raw events.
+
+Recording never blocks the caller: events go into a bounded queue and a
+background thread writes them in batches, one transaction per batch. When
+the queue is full, events are dropped and counted in the metrics.
+"""
+import collections
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from visionarmor import metrics
+from visionarmor.counting import TARGET_CLASSES, VIOLATION_CLASSES
+
+EVENTS_DB = os.environ.get("VISIONARMOR_EVENTS_DB", "runs/events.db")
+BATCH_ROWS = 5000
+FLUSH_INTERVAL = 1.0
+MAX_PENDING = 10000
+PERIODS = {"hour": 3600, "day": 86400}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    ts REAL NOT NULL, source TEXT NOT NULL, frame INTEGER, class TEXT NOT NULL, count INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS detections_ts ON detections (ts);
+CREATE INDEX IF NOT EXISTS detections_source ON detections (source, ts);
+CREATE INDEX IF NOT EXISTS detections_class ON detections (class, ts);
+CREATE TABLE IF NOT EXISTS violations (
+    ts REAL NOT NULL, source TEXT NOT NULL, class TEXT NOT NULL, worker INTEGER,
+    start REAL, end REAL, count INTEGER NOT NULL DEFAULT 1);
+CREATE INDEX IF NOT EXISTS violations_ts ON violations (ts);
+CREATE INDEX IF NOT EXISTS violations_source ON violations (source, ts);
+CREATE INDEX IF NOT EXISTS violations_class ON violations (class, ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    period TEXT NOT NULL, bucket REAL NOT NULL, source TEXT NOT NULL, class TEXT NOT NULL,
+    detections INTEGER NOT NULL DEFAULT 0, violations INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (period, bucket, source, class)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rollups_class ON rollups (period, class, bucket);
+"""
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class EventStore:
+    """Append-only event log with a background batch writer."""
+
+    def __init__(self, path=EVENTS_DB):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _connect(path) as conn:
+            conn.executescript(SCHEMA)
+        self._queue = queue.Queue(maxsize=MAX_PENDING)
+        self._thread = threading.Thread(target=self._run, name="visionarmor-events", daemon=True)
+        self._thread.start()
+
+    # Recording (called from the inference path; never blocks)
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            metrics.inc("visionarmor_events_dropped_total", len(item[1]))
+
+    def record_counts(self, source, detection_info, ts=None, frame=None):
+        """Record the per-class counts of one image or frame."""
+        ts = time.time() if ts is None else ts
+        rows = [(ts, source, frame, cls, int(count)) for cls, count in detection_info.items() if count]
+        if rows:
+            self._put(("detections", rows))
+
+    def record_image(self, source, detection_info, ts=None):
+        """Record an image or camera frame: its counts, and one violation event per "no-" box."""
+        ts = time.time() if ts is None else ts
+        self.record_counts(source, detection_info, ts)
+        rows = [(ts, source, cls, None, None, None, int(detection_info[cls]))
+                for cls in VIOLATION_CLASSES if detection_info.get(cls)]
+        if rows:
+            self._put(("violations", rows))
+
+    def record_video(self, source, timeline, fps, events, ts=None):
+        """
+        Record a processed video: the per-frame counts of `timeline` (an
+        array of frames x classes, see `CountSeries`) and its violation
+        episodes. Frame times are counted from `ts` (default: now).
+        """
+        ts = time.time() if ts is None else ts
+        timeline = np.asarray(timeline)
+        frames, classes = np.nonzero(timeline)
+        rows = [(ts + int(f) / fps, source, int(f), TARGET_CLASSES[c], int(timeline[f, c]))
+                for f, c in zip(frames, classes)]
+        if rows:
+            self._put(("detections", rows))
+        self.record_episodes(source, events, ts)
+
+    def record_episodes(self, source, events, ts):
+        """
+        Record violation episodes from a `ViolationTracker`, one event each;
+        their `start` / `end` seconds are counted from `ts`.
+        """
+        rows = [(ts + event["start"], source, event["class"], event["worker"],
+                 ts + event["start"], ts + event["end"], 1) for event in events]
+        if rows:
+            self._put(("violations", rows))
+
+    # Writing (background thread)
+
+    def _run(self):
+        conn = _connect(self.path)
+        pending = {"detections": [], "violations": []}
+        waiters = []
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                item = None
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                pending[item[0]].extend(item[1])
+            size = len(pending["detections"]) + len(pending["violations"])
+            if waiters or size >= BATCH_ROWS or time.monotonic() >= deadline:
+                if size:
+                    try:
+                        self._write(conn, pending)
+                    except sqlite3.Error:
+                        metrics.inc("visionarmor_events_dropped_total", size)
+                    pending = {"detections": [], "violations": []}
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+                deadline = time.monotonic() + FLUSH_INTERVAL
+
+    def _write(self, conn, pending):
+        rollups = collections.Counter()
+        for ts, source, _, cls, count in pending["detections"]:
+            for period, seconds in PERIODS.items():
+                rollups[(period, ts // seconds * seconds, source, cls, "detections")] += count
+        for ts, source, cls, *_, count in pending["violations"]:
+            for period, seconds in PERIODS.items():
+                rollups[(period, ts // seconds * seconds, source, cls, "violations")] += count
+        start = time.perf_counter()
+        with conn:
+            conn.executemany("INSERT INTO detections VALUES (?, ?, ?, ?, ?)", pending["detections"])
+            conn.executemany("INSERT INTO violations VALUES (?, ?, ?, ?, ?, ?, ?)", pending["violations"])
+            conn.executemany(
+                "INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (period, bucket, source, class) "
+                "DO UPDATE SET detections = detections + excluded.detections, "
+                "violations = violations + excluded.violations",
+                [(period, bucket, source, cls, count if kind == "detections" else 0,
+                  count if kind == "violations" else 0)
+                 for (period, bucket, source, cls, kind), count in rollups.items()])
+        metrics.record_stage("events_write", time.perf_counter() - start)
+
+    def flush(self, timeout=None):
+        """Wait until everything recorded so far has been written."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    # Queries
+
+    def _query(self, sql, params):
+        conn = _connect(self.path)
+        try:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _where(time_column, start, end, source, cls, clauses=(), params=()):
+        clauses, params = list(clauses), list(params)
+        for clause, value in ((f"{time_column} >= ?", start), (f"{time_column} < ?", end),
+                              ("source = ?", source), ("class = ?", cls)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def rollup(self, period="day", start=None, end=None, source=None, cls=None):
+        """Detections and violations per `period` ('hour' or 'day') bucket and class, oldest first."""
+        where, params = self._where("bucket", start, end, source, cls, ["period = ?"], [period])
+        return self._query("SELECT bucket, class, SUM(detections) AS detections, SUM(violations) AS violations "
+                           f"FROM rollups{where} GROUP BY bucket, class ORDER BY bucket, class", params)
+
+    def _raw_violations(self, start, end, source, cls):
+        where, params = self._where("ts", start, end, source, cls)
+        return self._query(f"SELECT COALESCE(SUM(count), 0) AS n FROM violations{where}", params)[0]["n"]
+
+    def total_violations(self, start=None, end=None, source=None, cls=None):
+        """
+        Number of violation events in `[start, end)`, e.g. no-hardhat events on
+        one camera last week. Whole hours are read from the hourly rollups and
+        only the partial hours at either end from the raw events.
+        """
+        seconds = PERIODS["hour"]
+        inner_start = None if start is None else -(-start // seconds) * seconds
+        inner_end = None if end is None else end // seconds * seconds
+        if inner_start is not None and inner_end is not None and inner_start >= inner_end:
+            return self._raw_violations(start, end, source, cls)
+        where, params = self._where("bucket", inner_start, inner_end, source, cls, ["period = 'hour'"])
+        total = self._query(f"SELECT COALESCE(SUM(violations), 0) AS n FROM rollups{where}", params)[0]["n"]
+        if start is not None and start < inner_start:
+            total += self._raw_violations(start, inner_start, source, cls)
+        if end is not None and inner_end < end:
+            total += self._raw_violations(inner_end, end, source, cls)
+        return total
+
+    def violations(self, start=None, end=None, source=None, cls=None, limit=100):
+        """Most recent violation events, newest first."""
+        where, params = self._where("ts", start, end, source, cls)
+        return self._query(f"SELECT * FROM violations{where} ORDER BY ts DESC LIMIT ?", params + [limit])
+
+    def sources(self):
+        return [row["source"] for row in self._query("SELECT DISTINCT source FROM rollups ORDER BY source", [])]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_events():
+    """The process-wide event store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EventStore()
+        return _store
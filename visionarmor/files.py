@@ -0,0 +1,116 @@
+"""
+Serve large outputs straight from disk.
+
+Handing a 1-2 GB video to `st.download_button` or `st.video` copies it into
+the Streamlit server's memory on every rerun. When `VISIONARMOR_FILES_PORT`
+is set, a small HTTP server streams registered files from disk in chunks
+(with `Range` support, so the browser can seek in videos) and the page only
+hands the browser a link. `VISIONARMOR_FILES_URL` sets the public base URL
+of that server when it sits behind a proxy (default `http://localhost:<port>`).
+
+Links are unguessable tokens that only cover files registered with
+`file_url`; nothing else on disk is reachable.
+"""
+import mimetypes
+import os
+import re
+import secrets
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from visionarmor.storage import CHUNK_SIZE
+
+FILES_PORT = int(os.environ.get("VISIONARMOR_FILES_PORT", "0")) or None
+FILES_URL = os.environ.get("VISIONARMOR_FILES_URL")
+
+_lock = threading.Lock()
+_files = {}  # token -> (absolute path, download name)
+_tokens = {}  # (absolute path, download name) -> token
+_server = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self._send(body=True)
+
+    def do_HEAD(self):
+        self._send(body=False)
+
+    def _send(self, body):
+        path, _, query = self.path.partition("?")
+        with _lock:
+            entry = _files.get(path.strip("/"))
+        if entry is None or not os.path.isfile(entry[0]):
+            self.send_error(404)
+            return
+        path, name = entry
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(size - int(match.group(2)), 0)
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", mimetypes.guess_type(name)[0] or "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        if "download" in query:
+            self.send_header("Content-Disposition", f'attachment; filename="{name}"')
+        self.end_headers()
+        if not body:
+            return
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                try:
+                    self.wfile.write(chunk)
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+                remaining -= len(chunk)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_file_server(port=FILES_PORT):
+    """Start the file server once per process; does nothing when no port is configured."""
+    global _server
+    if not port:
+        return None
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _Handler)
+            threading.Thread(target=_server.serve_forever, name="visionarmor-files", daemon=True).start()
+    return _server
+
+
+def file_url(path, name=None, download=False):
+    """
+    Return a URL the browser can fetch `path` from, or None when the file
+    server is not running (callers then fall back to Streamlit's own widgets).
+    """
+    if _server is None:
+        return None
+    key = (os.path.abspath(path), name or os.path.basename(path))
+    with _lock:
+        token = _tokens.get(key)
+        if token is None:
+            token = _tokens[key] = secrets.token_urlsafe(16)
+            _files[token] = key
+    base = (FILES_URL or f"http://localhost:{_server.server_address[1]}").rstrip("/")
+    return f"{base}/{token}" + ("?download" if download else "")
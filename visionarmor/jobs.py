@@ -0,0 +1,167 @@
+"""
+Background jobs for long-running video processing.
+
+Work is submitted to a bounded thread pool and identified by a job id, so
+a Streamlit session can rerun (or reconnect with `?job=<id>`) and pick up
+progress or the finished result instead of blocking its script thread.
+A job that is no longer wanted can be cancelled: it is dropped while it
+is still queued and stops at its next frame once it runs.
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from visionarmor.storage import hold, release
+
+MAX_WORKERS = int(os.environ.get("VISIONARMOR_MAX_JOBS", "2"))
+FINISHED_TTL = 3600  # seconds a finished job stays available for pickup
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised from a job's progress callback to stop a cancelled job."""
+
+
+class Job:
+    """State of one submitted job, updated from the worker thread."""
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.frames_done = 0
+        self.total_frames = 0
+        self.latest = None  # most recent per-frame update (one frame only)
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self.future = None
+
+    def on_frame(self, update):
+        """Progress callback handed to `process_video`; stops the job once it is cancelled."""
+        if self.cancelled:
+            raise JobCancelled(self.id)
+        self.frames_done = update["index"] + 1
+        self.total_frames = update["total"]
+        self.latest = update
+
+    @property
+    def progress(self):
+        """Fraction of frames done (0-1), or None when the length is unknown."""
+        if not self.total_frames:
+            return None
+        return min(self.frames_done / self.total_frames, 1.0)
+
+    @property
+    def eta(self):
+        """Estimated seconds remaining, or None before the first frame."""
+        if self.status != RUNNING or not self.frames_done or not self.total_frames:
+            return None
+        elapsed = time.time() - self.started
+        return elapsed / self.frames_done * max(self.total_frames - self.frames_done, 0)
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+
+class JobManager:
+    """Runs submitted jobs on at most `max_workers` threads."""
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="visionarmor-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, holds=(), **kwargs):
+        """
+        Queue `fn(*args, on_frame=..., **kwargs)` and return the job id.
+        `fn` receives the job's progress callback as `on_frame`. The
+        files in `holds` (e.g. the upload) are kept from the storage
+        janitor until the job has finished.
+        """
+        job = Job(uuid.uuid4().hex)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        for path in holds:
+            hold(path)
+        job.future = self._pool.submit(self._run, job, fn, args, kwargs, holds)
+        job.future.add_done_callback(lambda future: self._dropped(job, holds) if future.cancelled() else None)
+        return job.id
+
+    def cancel(self, job_id):
+        """
+        Cancel the job with `job_id`: a queued job never starts, a running
+        one stops at its next frame. Returns False if it is not active.
+        """
+        job = self.get(job_id)
+        if job is None or not job.active:
+            return False
+        job.cancelled = True
+        job.future.cancel()
+        return True
+
+    @staticmethod
+    def _dropped(job, holds):
+        job.status = CANCELLED
+        job.finished = time.time()
+        for path in holds:
+            release(path)
+
+    def _run(self, job, fn, args, kwargs, holds=()):
+        job.status = RUNNING
+        job.started = time.time()
+        try:
+            job.result = fn(*args, on_frame=job.on_frame, **kwargs)
+            job.status = DONE
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as exc:
+            job.error = str(exc)
+            job.status = FAILED
+        finally:
+            job.finished = time.time()
+            job.latest = None
+            for path in holds:
+                release(path)
+
+    def get(self, job_id):
+        """Return the job with `job_id`, or None if it is unknown or expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_position(self, job_id):
+        """1-based position among queued jobs (0 if the job is not queued)."""
+        with self._lock:
+            queued = sorted((j for j in self._jobs.values() if j.status == QUEUED),
+                            key=lambda j: j.submitted)
+        for position, job in enumerate(queued, start=1):
+            if job.id == job_id:
+                return position
+        return 0
+
+    def _prune(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and now - job.finished > FINISHED_TTL]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_jobs():
+    """The process-wide job manager shared by all sessions."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
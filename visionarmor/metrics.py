@@ -0,0 +1,194 @@
+"""
+Hot-path metrics.
+
+Stages of image and video processing are timed into Prometheus-style
+histograms, and requests, detections and violations are counted per class.
+The numbers can be scraped over HTTP, dumped to a JSON file periodically,
+or collected per request as a trace for the UI:
+
+  - `VISIONARMOR_METRICS_PORT`: serve `/metrics` (Prometheus text format) on this port.
+  - `VISIONARMOR_METRICS_JSON`: write a JSON snapshot to this path every
+    `VISIONARMOR_METRICS_INTERVAL` seconds (default 60).
+"""
+import contextlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+_lock = threading.Lock()
+_counters = {}  # (name, labels) -> float
+_histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+_help = {
+    "visionarmor_stage_seconds": ("histogram", "Time spent in each processing stage."),
+    "visionarmor_requests_total": ("counter", "Processed requests by mode and cache result."),
+    "visionarmor_detections_total": ("counter", "Detections by class."),
+    "visionarmor_violations_total": ("counter", "Missing-PPE detections (images) or episodes (videos) by class."),
+    "visionarmor_events_dropped_total": ("counter", "Detection history rows dropped (queue full or write error)."),
+}
+_local = threading.local()
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Add `value` to a counter."""
+    with _lock:
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    """Record one observation in a histogram with `STAGE_BUCKETS`."""
+    with _lock:
+        key = _key(name, labels)
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * len(STAGE_BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(STAGE_BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+        hist[-2] += seconds
+        hist[-1] += 1
+
+
+def record_stage(stage, seconds, **labels):
+    """Record a stage duration in the histogram and in the current request trace."""
+    observe("visionarmor_stage_seconds", seconds, stage=stage, **labels)
+    trace = getattr(_local, "trace", None)
+    if trace is not None:
+        trace.append((stage, seconds))
+
+
+@contextlib.contextmanager
+def timed(stage, **labels):
+    """Time the enclosed block as `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start, **labels)
+
+
+@contextlib.contextmanager
+def request_trace():
+    """
+    Collect the stages recorded by this thread inside the block into a list
+    of `(stage, seconds)` pairs, for showing a per-request breakdown.
+    """
+    trace = []
+    previous = getattr(_local, "trace", None)
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+def count_detections(detection_info, violations=None, mode="image"):
+    """Count per-class detections and violations of one processed request."""
+    for cls, count in detection_info.items():
+        if count:
+            inc("visionarmor_detections_total", count, **{"class": cls, "mode": mode})
+    for cls, count in (violations or {}).items():
+        if count:
+            inc("visionarmor_violations_total", count, **{"class": cls, "mode": mode})
+
+
+def _format_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: list(value) for key, value in _histograms.items()}
+    lines = []
+    for name, (kind, text) in _help.items():
+        lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (metric, labels), hist in sorted(histograms.items()):
+            if metric != name:
+                continue
+            for bound, count in zip(STAGE_BUCKETS, hist):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {hist[-1]}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {hist[-2]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot():
+    """All metrics as a JSON-serializable dictionary."""
+    with _lock:
+        return {
+            "time": time.time(),
+            "counters": [{"name": name, "labels": dict(labels), "value": value}
+                         for (name, labels), value in sorted(_counters.items())],
+            "histograms": [{"name": name, "labels": dict(labels),
+                            "buckets": dict(zip(map(str, STAGE_BUCKETS), hist[:len(STAGE_BUCKETS)])),
+                            "sum": hist[-2], "count": hist[-1]}
+                           for (name, labels), hist in sorted(_histograms.items())],
+        }
+
+
+def dump_json(path):
+    """Write `snapshot()` to `path` atomically."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot(), f, indent=2)
+    os.replace(tmp, path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_started = False
+_started_lock = threading.Lock()
+
+
+def start_exporters():
+    """Start the HTTP endpoint and/or JSON dumper configured in the environment (once per process)."""
+    global _started
+    with _started_lock:
+        if _started:
+            return
+        _started = True
+    port = os.environ.get("VISIONARMOR_METRICS_PORT")
+    if port:
+        server = ThreadingHTTPServer(("0.0.0.0", int(port)), _Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    path = os.environ.get("VISIONARMOR_METRICS_JSON")
+    if path:
+        interval = float(os.environ.get("VISIONARMOR_METRICS_INTERVAL", "60"))
+
+        def run():
+            while True:
+                time.sleep(interval)
+                dump_json(path)
+
+        threading.Thread(target=run, name="metrics-json", daemon=True).start()
@@ -0,0 +1,119 @@
+"""
+Model registry.
+
+Loading `best.pt` and fusing its layers costs far more than a single
+inference, so each weights file is loaded once per process and kept warm
+across Streamlit reruns and sessions. A file is reloaded only when its
+modification time changes on disk.
+
+The backend (PyTorch or an exported ONNX Runtime / OpenVINO model, see
+`visionarmor.backends`) and the CPU thread count are chosen with the
+`VISIONARMOR_BACKEND` and `VISIONARMOR_THREADS` environment variables.
+
+Ultralytics (and with it torch and OpenCV) is only imported when a model is
+first loaded. `preload` does that, and the warm-up, on a background thread
+so an app can start serving pages that do not need the model right away.
+"""
+import copy
+import os
+import threading
+
+import numpy as np
+
+from visionarmor import metrics
+
+DEFAULT_WEIGHTS = os.environ.get("VISIONARMOR_WEIGHTS", "models/best.pt")
+DEFAULT_BACKEND = os.environ.get("VISIONARMOR_BACKEND", "torch")
+THREADS = int(os.environ.get("VISIONARMOR_THREADS", "0")) or None
+
+_lock = threading.Lock()
+_registry = {}  # (absolute path, backend) -> {"mtime": float, "model": ..., "warm": bool}
+
+
+def _entry(weights, backend):
+    """
+    Return the registry entry for `weights` on `backend`, (re)loading the
+    file when it is not cached yet or has changed on disk since it was loaded.
+    """
+    path = os.path.abspath(weights)
+    mtime = os.path.getmtime(path)
+    with _lock:
+        entry = _registry.get((path, backend))
+        if entry is None or entry["mtime"] != mtime:
+            with metrics.timed("model_load", backend=backend):
+                if backend == "torch":
+                    with metrics.timed("import", module="ultralytics"):
+                        from ultralytics import YOLO
+                    if THREADS:
+                        import torch
+                        torch.set_num_threads(THREADS)
+                    model = YOLO(path)
+                    model.fuse()
+                    entry = {"mtime": mtime, "model": model, "warm": False}
+                else:
+                    from visionarmor.backends import load_exported
+                    entry = {"mtime": mtime, "model": load_exported(path, backend, THREADS), "warm": True}
+            _registry[(path, backend)] = entry
+        return entry
+
+
+def get_model(weights=DEFAULT_WEIGHTS, backend=DEFAULT_BACKEND):
+    """
+    Return a YOLO handle for `weights` backed by the shared, already loaded
+    network.
+
+    For PyTorch each call gets its own shallow copy with a fresh predictor,
+    so concurrent sessions never share predictor state while the weights
+    themselves stay in memory only once. Exported backends return the one
+    shared model, which serializes its calls.
+    """
+    model = _entry(weights, backend)["model"]
+    if backend != "torch":
+        return model
+    handle = copy.copy(model)
+    handle.predictor = None
+    return handle
+
+
+def warmup(weights=DEFAULT_WEIGHTS, backend=DEFAULT_BACKEND, imgsz=640):
+    """
+    Run one dummy inference so the first real request does not pay for
+    predictor setup and lazy kernel initialisation. Safe to call on every
+    rerun: a model is only warmed up once per load.
+    """
+    entry = _entry(weights, backend)
+    if entry["warm"]:
+        return
+    blank = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+    get_model(weights, backend).predict(source=blank, imgsz=imgsz, show=False, save=False, verbose=False)
+    entry["warm"] = True
+
+
+_preload = None
+_preload_lock = threading.Lock()
+
+
+def _run_preload(weights, backend):
+    with metrics.timed("preload", backend=backend):
+        warmup(weights, backend)
+
+
+def preload(weights=DEFAULT_WEIGHTS, backend=DEFAULT_BACKEND):
+    """
+    Import the inference stack, load `weights` and warm them up on a
+    background thread, once per process. Requests that need the model
+    before it is ready simply wait for the registry lock.
+    """
+    global _preload
+    with _preload_lock:
+        if _preload is None:
+            _preload = threading.Thread(target=_run_preload, args=(weights, backend),
+                                        name="visionarmor-preload", daemon=True)
+            _preload.start()
+    return _preload
+
+
+def clear():
+    """Drop every cached model (used when weights are swapped out)."""
+    with _lock:
+        _registry.clear()
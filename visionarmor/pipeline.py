@@ -0,0 +1,164 @@
+"""
+Pipeline stages for video processing.
+
+Decoding, inference and annotation+encoding can run on separate threads
+connected by bounded queues: the decoder reads ahead while the model is
+busy, and drawing and writing frames overlaps with the next inference.
+A full queue blocks its producer, so memory stays bounded by the queue
+sizes. OpenCV and PyTorch release the GIL for their heavy work, which is
+what lets the stages overlap on multi-core CPUs.
+
+Each stage adds its wall time to a shared `timings` dictionary (one key
+per stage, written by one thread only).
+"""
+import queue
+import threading
+import time
+
+import cv2
+
+from visionarmor.results import open_video_writer
+
+DEFAULT_QUEUE_SIZE = 8
+STAGES = ("decode", "infer", "post", "encode")
+
+_END = object()
+
+
+def new_timings():
+    """Per-stage seconds, all starting at zero."""
+    return {stage: 0.0 for stage in STAGES}
+
+
+class _Failure:
+    def __init__(self, exc):
+        self.exc = exc
+
+
+def _put(q, item, stopped):
+    """Put `item` on `q`, giving up if `stopped` is set while waiting for space."""
+    while not stopped.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def decode_frames(video_path, timings, queue_size=None):
+    """
+    Yield the decoded frames of `video_path`.
+
+    With a `queue_size` the frames are read on a background thread up to
+    `queue_size` frames ahead; otherwise they are read inline.
+    """
+    if not queue_size:
+        cap = cv2.VideoCapture(video_path)
+        try:
+            while True:
+                start = time.perf_counter()
+                ok, frame = cap.read()
+                timings["decode"] += time.perf_counter() - start
+                if not ok:
+                    return
+                yield frame
+        finally:
+            cap.release()
+
+    frames = queue.Queue(maxsize=queue_size)
+    stopped = threading.Event()
+
+    def run():
+        cap = cv2.VideoCapture(video_path)
+        try:
+            while not stopped.is_set():
+                start = time.perf_counter()
+                ok, frame = cap.read()
+                timings["decode"] += time.perf_counter() - start
+                if not ok or not _put(frames, frame, stopped):
+                    break
+        except Exception as exc:
+            _put(frames, _Failure(exc), stopped)
+        finally:
+            cap.release()
+            _put(frames, _END, stopped)
+
+    thread = threading.Thread(target=run, name="video-decode", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = frames.get()
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.exc
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
+
+
+class VideoEncoder:
+    """
+    Draw detections onto frames and write them to an MP4 file.
+
+    With `threaded` set, `submit` only queues the work (blocking while
+    `queue_size` frames are pending) and a background thread does the
+    drawing and writing. `latest` is the most recently written annotated
+    frame.
+    """
+
+    def __init__(self, path, fps, timings, threaded=False, queue_size=DEFAULT_QUEUE_SIZE):
+        self.path = path
+        self.fps = fps
+        self.timings = timings
+        self.latest = None
+        self._writer = None
+        self._error = None
+        self._thread = None
+        if threaded:
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._thread = threading.Thread(target=self._run, name="video-encode", daemon=True)
+            self._thread.start()
+
+    def _encode(self, frame, result):
+        start = time.perf_counter()
+        annotated = result.plot(img=frame)
+        if self._writer is None:
+            self._writer = open_video_writer(self.path, self.fps, annotated)
+        self._writer.write(annotated)
+        self.latest = annotated
+        self.timings["encode"] += time.perf_counter() - start
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            if self._error is None:
+                try:
+                    self._encode(*item)
+                except Exception as exc:
+                    self._error = exc
+
+    def submit(self, frame, result):
+        """Annotate and write `frame` with the detections of `result`."""
+        if self._error is not None:
+            raise self._error
+        if self._thread is None:
+            self._encode(frame, result)
+        else:
+            self._queue.put((frame, result))
+
+    def close(self):
+        """Flush pending frames and finalize the video file."""
+        if self._thread is not None:
+            self._queue.put(_END)
+            self._thread.join()
+            self._thread = None
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,125 @@
+"""
+Regions of interest and exclusion zones.
+
+Fixed site cameras often see sidewalks, parked vehicles or other areas where
+PPE rules do not apply. A `RegionMask` holds polygons, with coordinates as
+fractions (0-1) of the frame width and height so one configuration fits any
+resolution:
+  - `include`: only these areas are watched (the whole frame if empty).
+  - `exclude`: areas inside these are ignored even if they are included.
+
+Frames are cropped to the bounding box of the included area before
+inference, and detections whose box centre falls outside the watched area
+are dropped with a vectorized point-in-polygon test, so they never reach the
+counts or alerts.
+
+A mask is configured as JSON, per upload or per camera:
+
+    {"include": [[[0.1, 0.3], [0.9, 0.3], [0.9, 1.0], [0.1, 1.0]]],
+     "exclude": [[[0.6, 0.3], [0.9, 0.3], [0.9, 0.6]]]}
+"""
+import json
+
+import numpy as np
+
+from visionarmor.results import boxes_result
+
+
+def points_in_polygon(points, polygon):
+    """
+    Even-odd test of `(N, 2)` points against one `(M, 2)` polygon, for all
+    points and edges at once. Returns a boolean array of length N.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    polygon = np.asarray(polygon, dtype=np.float64)
+    x, y = points[:, :1], points[:, 1:]
+    x1, y1 = polygon[:, 0], polygon[:, 1]
+    x2, y2 = np.roll(x1, -1), np.roll(y1, -1)
+    crosses = (y1 > y) != (y2 > y)
+    dy = np.where(y2 == y1, 1.0, y2 - y1)
+    x_edge = x1 + (y - y1) * (x2 - x1) / dy
+    return np.count_nonzero(crosses & (x < x_edge), axis=1) % 2 == 1
+
+
+class RegionMask:
+    """Include and exclude polygons in relative (0-1) frame coordinates."""
+
+    def __init__(self, include=(), exclude=()):
+        self.include = [np.asarray(polygon, dtype=np.float64) for polygon in include]
+        self.exclude = [np.asarray(polygon, dtype=np.float64) for polygon in exclude]
+        for polygon in self.include + self.exclude:
+            if polygon.ndim != 2 or polygon.shape[0] < 3 or polygon.shape[1] != 2:
+                raise ValueError("a polygon needs at least three [x, y] points")
+
+    @classmethod
+    def from_dict(cls, config):
+        return cls(config.get("include", ()), config.get("exclude", ()))
+
+    @classmethod
+    def from_json(cls, text):
+        """Parse a JSON configuration; returns None for an empty string."""
+        return cls.from_dict(json.loads(text)) if text and text.strip() else None
+
+    def params(self):
+        """Settings that change the output, for cache keys."""
+        return {"include": [polygon.tolist() for polygon in self.include],
+                "exclude": [polygon.tolist() for polygon in self.exclude]}
+
+    def crop_box(self, shape):
+        """Pixel `(x0, y0, x1, y1)` bounding the included area of a frame with `shape`."""
+        height, width = shape[:2]
+        if not self.include:
+            return 0, 0, width, height
+        points = np.concatenate(self.include) * (width, height)
+        x0, y0 = np.clip(np.floor(points.min(axis=0)), 0, (width, height)).astype(int)
+        x1, y1 = np.clip(np.ceil(points.max(axis=0)), 0, (width, height)).astype(int)
+        return x0, y0, max(x1, x0 + 1), max(y1, y0 + 1)
+
+    def crop(self, frame):
+        """Return a view of `frame` cropped to the included area and its `(x, y)` origin."""
+        x0, y0, x1, y1 = self.crop_box(frame.shape)
+        return frame[y0:y1, x0:x1], (x0, y0)
+
+    def contains(self, points, shape):
+        """Whether each pixel point of a frame with `shape` lies in the watched area."""
+        height, width = shape[:2]
+        relative = np.asarray(points, dtype=np.float64).reshape(-1, 2) / (width, height)
+        inside = np.ones(len(relative), dtype=bool)
+        if self.include:
+            inside = np.any([points_in_polygon(relative, polygon) for polygon in self.include], axis=0)
+        for polygon in self.exclude:
+            inside &= ~points_in_polygon(relative, polygon)
+        return inside
+
+    def restore(self, result, frame, origin):
+        """
+        Turn a `Results` predicted on a crop of `frame` at `origin` into one
+        in full-frame coordinates, keeping only boxes centred in the watched area.
+        """
+        data = np.zeros((0, 6), dtype=np.float32)
+        if result.boxes is not None and len(result.boxes):
+            data = result.boxes.data.cpu().numpy().copy()
+            data[:, [0, 2]] += origin[0]
+            data[:, [1, 3]] += origin[1]
+            centres = (data[:, :2] + data[:, 2:4]) / 2
+            data = data[self.contains(centres, frame.shape)]
+        return boxes_result(frame, result.path, result.names, data)
+
+    def predict(self, model, frame, predict=None, **predict_kwargs):
+        """
+        Predict on the watched part of `frame` and return a `Results` in
+        full-frame coordinates. `predict(model, image)` replaces the plain
+        `model.predict` call, e.g. with `Tiler.predict`.
+        """
+        crop, origin = self.crop(frame)
+        if predict is not None:
+            result = predict(model, crop, **predict_kwargs)
+        else:
+            result = model.predict(source=crop, show=False, save=False, verbose=False, **predict_kwargs)[0]
+        return self.restore(result, frame, origin)
+
+
+def load_regions(path):
+    """Read per-camera masks from a JSON file mapping a source (or name) to a mask configuration."""
+    with open(path) as f:
+        return {source: RegionMask.from_dict(config) for source, config in json.load(f).items()}
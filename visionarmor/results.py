@@ -0,0 +1,86 @@
+"""
+Helpers that turn in-memory YOLO `Results` into annotated files and counts.
+
+Every request writes into its own directory under `runs/detect`, so there is
+no need to wait for YOLO to save and then guess the newest output folder.
+OpenCV is imported by the functions that need it, so pages and tools that
+only use the constants and counts start without it.
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from visionarmor.counting import TARGET_CLASSES, VIOLATION_CLASSES, counts_to_dict, result_counts
+
+OUTPUT_ROOT = "runs/detect"
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+
+def new_output_dir(root=OUTPUT_ROOT):
+    """Create and return a fresh directory that belongs to a single request."""
+    os.makedirs(root, exist_ok=True)
+    return tempfile.mkdtemp(prefix="request-", dir=root)
+
+
+def boxes_result(orig_img, path, names, data):
+    """
+    Build a YOLO `Results` from `(N, 6)` `[x1, y1, x2, y2, conf, cls]` rows.
+    The boxes are stored as a tensor, like the model's own output, so code
+    that calls `.cpu().numpy()` on them works the same for both.
+    """
+    import torch
+    from ultralytics.engine.results import Results
+
+    data = np.ascontiguousarray(data, dtype=np.float32).reshape(-1, 6)
+    return Results(orig_img=orig_img, path=path, names=names, boxes=torch.from_numpy(data))
+
+
+def count_classes(result, conf_threshold=None):
+    """
+    Return a dictionary with a count for each of the 10 target classes found
+    in a single `Results` object, optionally ignoring boxes below
+    `conf_threshold`.
+    """
+    return counts_to_dict(result_counts(result, conf_threshold))
+
+
+def violation_alerts(detection_info):
+    """Return one warning message per "no-" class with a non-zero count."""
+    return [f"Warning: {detection_info[cls]} person(s) without {item} detected!"
+            for cls, item in VIOLATION_CLASSES.items() if detection_info.get(cls, 0) > 0]
+
+
+def save_annotated_image(result, out_dir, name="result.jpg"):
+    """Draw the detections of `result` and write them to `out_dir/name`."""
+    import cv2
+    path = os.path.join(out_dir, name)
+    cv2.imwrite(path, result.plot())
+    return path
+
+
+def video_fps(video_path, default=30.0):
+    """Frame rate of `video_path`, falling back to `default` when unknown."""
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    return fps if fps and fps > 0 else default
+
+
+def video_frame_count(video_path):
+    """Number of frames reported by the container (0 when unknown)."""
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return max(count, 0)
+
+
+def open_video_writer(path, fps, frame):
+    """Open an MP4 writer sized to match `frame`."""
+    import cv2
+    height, width = frame.shape[:2]
+    return cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
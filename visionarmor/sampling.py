@@ -0,0 +1,57 @@
+"""
+Frame sampling for long videos.
+
+A `FrameSampler` decides which decoded frames are sent to the detector:
+  - a fixed stride (every Nth frame) or a target inference FPS, and
+  - an optional motion gate that skips frames which barely differ from the
+    last frame that was inferred.
+
+Frames that are skipped reuse the previous detections, so the output video
+and per-class counts keep one entry per decoded frame.
+"""
+import cv2
+import numpy as np
+
+
+class FrameSampler:
+    """
+    Decide per frame whether to run inference.
+
+    `motion_threshold` is the fraction of pixels (0-1) that must change by
+    more than `pixel_delta` grey levels, on a `size`-pixel-wide thumbnail,
+    before a frame counts as different. `None` disables the motion gate.
+    """
+
+    def __init__(self, stride=1, motion_threshold=None, pixel_delta=25, size=64):
+        self.stride = max(int(stride), 1)
+        self.motion_threshold = motion_threshold
+        self.pixel_delta = pixel_delta
+        self.size = size
+        self._reference = None
+
+    @classmethod
+    def for_target_fps(cls, video_fps, target_fps, **kwargs):
+        """Build a sampler whose stride brings `video_fps` down to about `target_fps`."""
+        stride = round(video_fps / target_fps) if target_fps and target_fps > 0 else 1
+        return cls(stride=stride, **kwargs)
+
+    def _thumbnail(self, frame):
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (self.size, max(int(height * self.size / width), 1)),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (3, 3), 0)
+
+    def should_infer(self, index, frame):
+        """Return True if frame number `index` should go through the detector."""
+        if index % self.stride != 0:
+            return False
+        if self.motion_threshold is None:
+            return True
+        thumb = self._thumbnail(frame)
+        if self._reference is not None:
+            changed = np.count_nonzero(cv2.absdiff(thumb, self._reference) > self.pixel_delta)
+            if changed < self.motion_threshold * thumb.size:
+                return False
+        self._reference = thumb
+        return True
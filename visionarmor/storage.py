@@ -0,0 +1,173 @@
+"""
+Artifact storage and cleanup.
+
+Uploads are spooled into `runs/uploads` and every request writes its
+outputs to its own directory under `runs/detect`. A background janitor
+removes entries older than the retention window and, if the total size is
+still above the cap, the oldest entries until it is not. Entries younger
+than a short grace period are never touched, and neither are entries
+holding a path marked in use with `hold`: uploads from `spool_upload`
+(for an hour), inputs of queued and running jobs, and whatever a session
+is currently showing (renewed on every rerun).
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from visionarmor.results import OUTPUT_ROOT
+
+UPLOAD_ROOT = "runs/uploads"
+RETENTION_SECONDS = float(os.environ.get("VISIONARMOR_RETENTION_HOURS", "24")) * 3600
+MAX_BYTES = int(os.environ.get("VISIONARMOR_RUNS_MAX_MB", "4096")) * 1024 * 1024
+GRACE_SECONDS = 600
+SWEEP_INTERVAL = 300
+CHUNK_SIZE = 8 * 1024 * 1024
+LEASE_SECONDS = 3600
+
+_holds = {}  # absolute path -> [references, lease expiry]
+_holds_lock = threading.Lock()
+
+
+def hold(path, seconds=None):
+    """
+    Keep `path` (a file or directory under the storage roots) from being
+    swept. With `seconds`, this is a lease that lapses unless renewed;
+    without, it lasts until a matching `release(path)`.
+    """
+    path = os.path.abspath(path)
+    with _holds_lock:
+        entry = _holds.setdefault(path, [0, 0.0])
+        if seconds is None:
+            entry[0] += 1
+        else:
+            entry[1] = max(entry[1], time.time() + seconds)
+
+
+def release(path):
+    """Drop one reference taken with `hold(path)`."""
+    path = os.path.abspath(path)
+    with _holds_lock:
+        entry = _holds.get(path)
+        if entry is not None:
+            entry[0] = max(entry[0] - 1, 0)
+
+
+def _held(now):
+    """Absolute paths currently in use, pruning lapsed holds."""
+    with _holds_lock:
+        for path in [path for path, (refs, until) in _holds.items() if not refs and until <= now]:
+            del _holds[path]
+        return list(_holds)
+
+
+def new_upload_file(suffix):
+    """Open a named file in the upload area; the janitor removes it later."""
+    os.makedirs(UPLOAD_ROOT, exist_ok=True)
+    return tempfile.NamedTemporaryFile(delete=False, prefix="upload-", suffix=suffix, dir=UPLOAD_ROOT)
+
+
+def spool_upload(uploaded, suffix, chunk_size=CHUNK_SIZE):
+    """
+    Copy a file-like upload into the upload area `chunk_size` bytes at a time
+    and return the path, so no second full copy of the upload is made in
+    memory. The file is held for `LEASE_SECONDS`.
+    """
+    uploaded.seek(0)
+    with new_upload_file(suffix) as f:
+        hold(f.name, LEASE_SECONDS)
+        shutil.copyfileobj(uploaded, f, chunk_size)
+    return f.name
+
+
+def _usage(path):
+    """Return `(size, last_modified)` of a file or of everything under a directory."""
+    stat = os.stat(path)
+    size, mtime = (stat.st_size, stat.st_mtime) if os.path.isfile(path) else (0, stat.st_mtime)
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                stat = os.stat(os.path.join(dirpath, name))
+            except OSError:
+                continue
+            size += stat.st_size
+            mtime = max(mtime, stat.st_mtime)
+    return size, mtime
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def sweep(roots=(OUTPUT_ROOT, UPLOAD_ROOT), retention=RETENTION_SECONDS, max_bytes=MAX_BYTES,
+          grace=GRACE_SECONDS, now=None):
+    """
+    Apply the retention window and size cap to the entries directly inside
+    `roots` and return the number of entries removed. Entries that are or
+    contain a held path are kept.
+    """
+    now = time.time() if now is None else now
+    held = _held(now)
+    entries = []
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        for entry in os.scandir(root):
+            try:
+                size, mtime = _usage(entry.path)
+            except OSError:
+                continue
+            path = os.path.abspath(entry.path)
+            in_use = any(p == path or p.startswith(path + os.sep) for p in held)
+            entries.append((mtime, entry.path, size, in_use))
+    entries.sort()
+
+    removed = 0
+    kept = []
+    for mtime, path, size, in_use in entries:
+        age = now - mtime
+        if age > retention and age > grace and not in_use:
+            _remove(path)
+            removed += 1
+        else:
+            kept.append((mtime, path, size, in_use))
+
+    # Held entries count towards the cap but are never removed
+    total = sum(size for _, _, size, _ in kept)
+    for mtime, path, size, in_use in kept:
+        if total <= max_bytes:
+            break
+        if now - mtime <= grace or in_use:
+            continue
+        _remove(path)
+        removed += 1
+        total -= size
+    return removed
+
+
+_janitor = None
+_janitor_lock = threading.Lock()
+
+
+def _run_janitor(interval):
+    while True:
+        sweep()
+        time.sleep(interval)
+
+
+def start_janitor(interval=SWEEP_INTERVAL):
+    """Start the background cleanup thread once per process."""
+    global _janitor
+    with _janitor_lock:
+        if _janitor is None:
+            _janitor = threading.Thread(target=_run_janitor, args=(interval,),
+                                        name="visionarmor-janitor", daemon=True)
+            _janitor.start()
+    return _janitor
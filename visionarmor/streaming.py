@@ -0,0 +1,127 @@
+"""
+Frame-by-frame video inference.
+
+`stream_video` runs YOLO one frame at a time, writes each annotated frame to
+the output video as soon as it is produced and yields a progress update, so
+the page can show results while the clip is still being processed. Memory
+stays bounded regardless of the length of the clip.
+
+With `pipelined=True`, decoding and annotation+encoding run on their own
+threads around the inference loop (see `visionarmor.pipeline`).
+"""
+import os
+import time
+
+import numpy as np
+
+from visionarmor.counting import (TARGET_CLASSES, VIOLATION_INDICES, CountSeries, counts_to_dict,
+                                  result_counts)
+from visionarmor.models import get_model
+from visionarmor.pipeline import DEFAULT_QUEUE_SIZE, VideoEncoder, decode_frames, new_timings
+from visionarmor.results import save_annotated_image, video_fps, video_frame_count
+
+
+def _predict_all(model, video_path, predict_kwargs, timings):
+    """Yield `(frame, result, inferred)` for every frame using YOLO's own stream."""
+    results = model.predict(source=video_path, stream=True, show=False, save=False,
+                            verbose=False, **predict_kwargs)
+    start = time.perf_counter()
+    for result in results:
+        timings["infer"] += time.perf_counter() - start
+        yield result.orig_img, result, True
+        start = time.perf_counter()
+
+
+def _predict_frames(model, frames, sampler, predict_kwargs, timings, region=None):
+    """
+    Yield `(frame, result, inferred)` for every decoded frame, running the
+    detector only on frames chosen by `sampler` (all frames without one) and
+    carrying the last result forward for the others. With a `RegionMask`
+    only the watched area of each frame is inferred.
+    """
+    last = None
+    for index, frame in enumerate(frames):
+        inferred = last is None or sampler is None or sampler.should_infer(index, frame)
+        if inferred:
+            start = time.perf_counter()
+            if region is not None:
+                last = region.predict(model, frame, **predict_kwargs)
+            else:
+                last = model.predict(source=frame, show=False, save=False,
+                                     verbose=False, **predict_kwargs)[0]
+            timings["infer"] += time.perf_counter() - start
+        yield frame, last, inferred
+
+
+def stream_video(video_path, out_dir, model=None, sampler=None, tracker=None, sample_count=3,
+                 conf_threshold=None, pipelined=False, queue_size=DEFAULT_QUEUE_SIZE, region=None,
+                 **predict_kwargs):
+    """
+    Run detection over `video_path` and yield one update per frame:
+      - 'index': zero-based frame number.
+      - 'total': number of frames in the clip (0 when unknown).
+      - 'frame': the latest annotated frame (BGR array; with `pipelined` it
+        may trail the current frame by up to `queue_size` frames).
+      - 'counts': per-class detections in this frame.
+      - 'totals': per-class detections summed over all frames so far.
+      - 'inferred': whether the detector ran on this frame.
+      - 'inferred_frames': number of frames the detector has run on so far.
+      - 'violation_frames': number of frames so far with a "no-" detection.
+      - 'events': violation episodes closed so far (with a `ViolationTracker`).
+      - 'timings': seconds spent so far in each stage (decode, infer, post, encode).
+      - 'video': path of the annotated video being written to `out_dir`.
+      - 'images': paths of up to `sample_count` annotated sample frames.
+      - 'timeline': path of the per-frame counts (`.npy`, frames x classes).
+
+    With a `FrameSampler` only the frames it selects are inferred; skipped
+    frames are annotated and counted with the most recent detections.
+    Boxes below `conf_threshold` are left out of the counts, and with a
+    `RegionMask` so are boxes outside its watched area. A
+    `ViolationTracker` sees every frame and has all episodes closed once the
+    stream ends. The video and timeline files are complete once the
+    generator is exhausted (or closed).
+    """
+    model = model or get_model()
+    processed_video = os.path.join(out_dir, "processed_video.mp4")
+    timeline = os.path.join(out_dir, "timeline.npy")
+    total = video_frame_count(video_path)
+    timings = new_timings()
+    encoder = VideoEncoder(processed_video, video_fps(video_path), timings, threaded=pipelined,
+                           queue_size=queue_size)
+    series = CountSeries(capacity=max(total, 1))
+    totals = np.zeros(len(TARGET_CLASSES), dtype=np.intp)
+    sample_images = []
+    inferred_frames = 0
+    violation_frames = 0
+    if sampler is None and region is None and not pipelined and not getattr(model, "frame_by_frame", False):
+        frames = _predict_all(model, video_path, predict_kwargs, timings)
+    else:
+        decoded = decode_frames(video_path, timings, queue_size if pipelined else None)
+        frames = _predict_frames(model, decoded, sampler, predict_kwargs, timings, region)
+    try:
+        for i, (frame, result, inferred) in enumerate(frames):
+            encoder.submit(frame, result)
+            start = time.perf_counter()
+            counts = result_counts(result, conf_threshold)
+            series.append(counts)
+            totals += counts
+            inferred_frames += inferred
+            violation_frames += bool(counts[VIOLATION_INDICES].any())
+            if tracker is not None:
+                tracker.update(i, result)
+            if inferred and len(sample_images) < sample_count and counts.any():
+                sample_images.append(save_annotated_image(result, out_dir, f"frame_{i:06d}.jpg"))
+            timings["post"] += time.perf_counter() - start
+            latest = encoder.latest
+            yield {"index": i, "total": total, "frame": latest if latest is not None else frame,
+                   "counts": counts_to_dict(counts), "totals": counts_to_dict(totals),
+                   "inferred": inferred, "inferred_frames": inferred_frames,
+                   "violation_frames": violation_frames,
+                   "events": tracker.events if tracker is not None else [], "timings": timings,
+                   "video": processed_video, "images": sample_images, "timeline": timeline}
+    finally:
+        frames.close()
+        encoder.close()
+        series.save(timeline)
+        if tracker is not None:
+            tracker.finish()
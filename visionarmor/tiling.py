@@ -0,0 +1,105 @@
+"""
+Sliced inference for large images.
+
+Drone and wide-angle crane-camera images are often 4K or more; scaled down
+to the model's input size, distant workers shrink to a few pixels. A
+`Tiler` cuts such an image into overlapping tiles at the model's native
+resolution, runs them (plus the whole image, for large objects) through the
+model as one batch, shifts the tile detections back into image coordinates
+and merges duplicates across tiles with class-aware NMS.
+
+Tiles are NumPy views into the decoded image, so slicing costs no copies.
+"""
+import numpy as np
+
+from visionarmor.results import boxes_result
+from visionarmor.tracking import ios_matrix
+
+
+def tile_origins(length, tile_size, overlap):
+    """
+    Start offsets of tiles covering `length` pixels. Consecutive tiles share
+    `overlap` (a fraction of `tile_size`) and the last tile ends at the edge.
+    """
+    if length <= tile_size:
+        return np.zeros(1, dtype=np.intp)
+    step = max(int(tile_size * (1 - overlap)), 1)
+    starts = np.arange(0, length - tile_size + 1, step)
+    if starts[-1] + tile_size < length:
+        starts = np.append(starts, length - tile_size)
+    return starts
+
+
+def nms(boxes, scores, classes, threshold):
+    """
+    Greedy class-aware NMS on `(N, 4)` xyxy boxes; returns the indices kept,
+    highest score first.
+
+    Overlap is measured as intersection over the smaller box, so a box cut
+    in half at a tile edge is still merged into the whole box from the
+    neighbouring tile.
+    """
+    order = np.argsort(-scores)
+    boxes, classes = boxes[order], classes[order]
+    suppress = (ios_matrix(boxes, boxes) > threshold) & (classes[:, None] == classes[None, :])
+    keep = np.ones(len(order), dtype=bool)
+    for i in range(len(order)):
+        if keep[i]:
+            keep[i + 1:] &= ~suppress[i, i + 1:]
+    return order[keep]
+
+
+class Tiler:
+    """
+    Run a YOLO model over overlapping tiles of a large image.
+
+    Tiles are `tile_size` pixels square and overlap by `overlap` (0-1) of
+    their size. Images no larger than one tile are predicted as usual. With
+    `include_full`, the whole (downscaled) image is added to the batch so
+    objects larger than a tile are still found. Detections that overlap by
+    more than `merge_threshold` (intersection over the smaller box) are
+    merged.
+    """
+
+    def __init__(self, tile_size=640, overlap=0.2, merge_threshold=0.5, include_full=True):
+        self.tile_size = int(tile_size)
+        self.overlap = overlap
+        self.merge_threshold = merge_threshold
+        self.include_full = include_full
+
+    def tiles(self, image):
+        """Return `(tiles, offsets)`: views into `image` and their `(x, y)` origins as an `(N, 2)` array."""
+        height, width = image.shape[:2]
+        ys, xs = np.meshgrid(tile_origins(height, self.tile_size, self.overlap),
+                             tile_origins(width, self.tile_size, self.overlap), indexing="ij")
+        offsets = np.stack([xs.ravel(), ys.ravel()], axis=1)
+        size = self.tile_size
+        return [image[y:y + size, x:x + size] for x, y in offsets], offsets
+
+    def predict(self, model, image, **predict_kwargs):
+        """
+        Predict on `image` (a BGR array) and return one YOLO `Results` with
+        the merged detections in image coordinates.
+        """
+        height, width = image.shape[:2]
+        if height <= self.tile_size and width <= self.tile_size:
+            return model.predict(source=image, show=False, save=False, verbose=False, **predict_kwargs)[0]
+
+        tiles, offsets = self.tiles(image)
+        sources = tiles + [image] if self.include_full else tiles
+        results = model.predict(source=sources, imgsz=self.tile_size, show=False, save=False,
+                                verbose=False, **predict_kwargs)
+
+        shifts = np.zeros((len(results), 4), dtype=np.float32)
+        shifts[:len(offsets)] = np.tile(offsets, 2)
+        data = [result.boxes.data.cpu().numpy() + np.pad(shift, (0, 2))
+                for result, shift in zip(results, shifts) if result.boxes is not None and len(result.boxes)]
+        data = np.concatenate(data) if data else np.zeros((0, 6), dtype=np.float32)
+        if len(data):
+            data = data[nms(data[:, :4], data[:, 4], data[:, 5], self.merge_threshold)]
+        return boxes_result(image, results[0].path, model.names, data)
+
+    def params(self):
+        """Settings that change the output, for cache keys."""
+        return {"tile_size": self.tile_size, "overlap": self.overlap,
+                "merge_threshold": self.merge_threshold, "include_full": self.include_full}
@@ -0,0 +1,192 @@
+"""
+Per-worker violation tracking for videos.
+
+`person` boxes get stable ids from a lightweight IoU tracker (two-stage
+matching in the style of ByteTrack: confident boxes first, then the rest).
+Each "no-" box is attributed to the person box that covers most of it, and
+consecutive frames of the same worker missing the same item are merged
+into one violation episode with start and end timestamps. Everything runs
+on NumPy arrays on the CPU.
+"""
+import numpy as np
+
+from visionarmor.counting import TARGET_CLASSES, TARGET_INDEX, VIOLATION_INDICES, class_index_map
+
+PERSON_INDEX = TARGET_INDEX['person']
+
+
+def _area(boxes):
+    return np.clip(boxes[:, 2] - boxes[:, 0], 0, None) * np.clip(boxes[:, 3] - boxes[:, 1], 0, None)
+
+
+def _intersection(a, b):
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    return wh[..., 0] * wh[..., 1]
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between `(N, 4)` and `(M, 4)` xyxy boxes."""
+    inter = _intersection(a, b)
+    return inter / (_area(a)[:, None] + _area(b)[None, :] - inter + 1e-9)
+
+
+def ioa_matrix(a, b):
+    """Pairwise fraction of each box in `a` that is covered by each box in `b`."""
+    return _intersection(a, b) / (_area(a)[:, None] + 1e-9)
+
+
+def ios_matrix(a, b):
+    """Pairwise intersection over the smaller box of each pair."""
+    return _intersection(a, b) / (np.minimum(_area(a)[:, None], _area(b)[None, :]) + 1e-9)
+
+
+def greedy_match(scores, threshold):
+    """Match rows to columns by descending score; returns `(row, col)` pairs above `threshold`."""
+    pairs = []
+    if scores.size == 0:
+        return pairs
+    used_rows, used_cols = set(), set()
+    for flat in np.argsort(-scores, axis=None):
+        row, col = divmod(int(flat), scores.shape[1])
+        if scores[row, col] < threshold:
+            break
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        pairs.append((row, col))
+    return pairs
+
+
+class IoUTracker:
+    """
+    Assign stable ids to boxes across frames.
+
+    Boxes scoring at least `high_conf` are matched to live tracks first and
+    may start new tracks; weaker boxes can only continue an existing track.
+    Tracks not seen for more than `max_age` frames are dropped.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_age=30, high_conf=0.5):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.high_conf = high_conf
+        self._tracks = {}  # id -> (box, last frame index)
+        self._next_id = 1
+
+    def update(self, boxes, scores, frame_index):
+        """Return an id per box (0 for weak boxes that matched no track)."""
+        self._tracks = {tid: track for tid, track in self._tracks.items()
+                        if frame_index - track[1] <= self.max_age}
+        ids = np.zeros(len(boxes), dtype=np.int64)
+        free = list(self._tracks)
+        high = scores >= self.high_conf
+        for stage in (np.flatnonzero(high), np.flatnonzero(~high)):
+            if len(stage) == 0 or not free:
+                continue
+            track_boxes = np.array([self._tracks[tid][0] for tid in free])
+            matches = greedy_match(iou_matrix(boxes[stage], track_boxes), self.iou_threshold)
+            for row, col in matches:
+                ids[stage[row]] = free[col]
+            matched = {col for _, col in matches}
+            free = [tid for col, tid in enumerate(free) if col not in matched]
+        for i in np.flatnonzero(high & (ids == 0)):
+            ids[i] = self._next_id
+            self._next_id += 1
+        for i in np.flatnonzero(ids):
+            self._tracks[int(ids[i])] = (boxes[i], frame_index)
+        return ids
+
+
+class ViolationTracker:
+    """
+    Turn per-frame detections into one event per worker per violation episode.
+
+    An episode of a worker missing an item ends once that violation has not
+    been seen for `gap_seconds` (at least `min_gap_frames` frames). Episodes
+    shorter than `min_frames` frames are discarded as flicker. "no-" boxes
+    not covered (by at least `min_overlap`) by any tracked person are tracked
+    on their own and reported with `worker` set to None.
+    """
+
+    def __init__(self, fps, gap_seconds=1.0, min_gap_frames=1, min_frames=1, min_overlap=0.5):
+        self.fps = fps
+        self.gap_frames = max(int(round(gap_seconds * fps)), min_gap_frames)
+        self.min_frames = min_frames
+        self.min_overlap = min_overlap
+        self.persons = IoUTracker(max_age=self.gap_frames)
+        self.unassigned = IoUTracker(max_age=self.gap_frames, high_conf=0.0)
+        self.events = []
+        self._open = {}  # (worker key, class index) -> [start frame, last frame, frames seen]
+
+    def update(self, frame_index, result):
+        """Feed the detections of frame `frame_index` (a YOLO `Results`)."""
+        boxes = result.boxes
+        if boxes is not None and boxes.cls is not None and len(boxes) > 0:
+            xyxy = boxes.xyxy.cpu().numpy()
+            conf = boxes.conf.cpu().numpy()
+            mapped = class_index_map(result.names)[boxes.cls.cpu().numpy().astype(np.intp)]
+            self._observe(frame_index, xyxy, conf, mapped)
+        self._close(lambda last: frame_index - last > self.gap_frames)
+
+    def _observe(self, frame_index, xyxy, conf, mapped):
+        is_person = mapped == PERSON_INDEX
+        person_boxes = xyxy[is_person]
+        person_ids = self.persons.update(person_boxes, conf[is_person], frame_index)
+
+        is_violation = np.isin(mapped, VIOLATION_INDICES)
+        violation_boxes = xyxy[is_violation]
+        violation_cls = mapped[is_violation]
+        if len(violation_boxes) == 0:
+            return
+        owner = np.zeros(len(violation_boxes), dtype=np.int64)
+        if len(person_boxes):
+            overlap = ioa_matrix(violation_boxes, person_boxes)
+            best = overlap.argmax(axis=1)
+            covered = overlap[np.arange(len(best)), best] >= self.min_overlap
+            owner[covered] = person_ids[best[covered]]
+        orphans = np.flatnonzero(owner == 0)
+        orphan_ids = self.unassigned.update(violation_boxes[orphans], conf[is_violation][orphans], frame_index)
+
+        keys = [("worker", int(pid)) for pid in owner]
+        for i, oid in zip(orphans, orphan_ids):
+            keys[i] = ("unassigned", int(oid))
+        for key, cls in zip(keys, violation_cls.tolist()):
+            episode = self._open.get((key, cls))
+            if episode is None:
+                self._open[(key, cls)] = [frame_index, frame_index, 1]
+            elif episode[1] != frame_index:
+                episode[1] = frame_index
+                episode[2] += 1
+
+    def _close(self, should_close):
+        for (key, cls), (start, last, seen) in list(self._open.items()):
+            if not should_close(last):
+                continue
+            del self._open[(key, cls)]
+            if seen < self.min_frames:
+                continue
+            self.events.append({
+                "worker": key[1] if key[0] == "worker" else None,
+                "class": TARGET_CLASSES[cls],
+                "start": round(start / self.fps, 3),
+                "end": round((last + 1) / self.fps, 3),
+                "start_frame": start,
+                "end_frame": last,
+            })
+
+    def finish(self):
+        """Close all open episodes; call once after the last frame."""
+        self._close(lambda last: True)
+        self.events.sort(key=lambda event: (event["start_frame"], event["class"]))
+        return self.events
+
+
+def episode_counts(events):
+    """Number of violation episodes per "no-" class, in `detection_info` form."""
+    counts = {TARGET_CLASSES[i]: 0 for i in VIOLATION_INDICES}
+    for event in events:
+        counts[event["class"]] += 1
+    return counts